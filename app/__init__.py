@@ -3,21 +3,20 @@ LeetCode Roadmap Generator Application Factory.
 
 This module contains the application factory for creating Flask app instances.
 """
-import os
-from flask import Flask, request
+import atexit
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask
+from flask.logging import default_handler
 
 from .config import config, get_config
-from .services import ClerkService, StripeService, OpenAIService, RoadmapService
+from .extensions import cache, server_session
+from .json_provider import AppJSONProvider
+from .services import AssessmentService, ClerkService, StripeService, OpenAIService, RoadmapService
 from .services.challenge_service import ChallengeService
-from .auth.access import (
-    get_current_user,
-    has_premium_access,
-    has_ai_access,
-    has_system_design_access,
-    has_guides_access,
-    is_allowed_user,
-    is_admin
-)
+from .auth.access import get_current_user, get_current_access
+from .utils.templating import get_theme
 
 
 def create_app(config_name: str = None) -> Flask:
@@ -30,21 +29,27 @@ def create_app(config_name: str = None) -> Flask:
     Returns:
         Configured Flask application instance
     """
-    # Determine configuration
-    if config_name is None:
-        env = os.environ.get('FLASK_ENV', 'development')
-        config_name = 'production' if env == 'production' else 'development'
+    # Determine configuration (FLASK_ENV resolution lives in get_config)
+    config_class = get_config() if config_name is None else config[config_name]
 
     # Create Flask app
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
+    app.json = AppJSONProvider(app)
 
     # Load configuration
-    app.config.from_object(config[config_name])
+    app.config.from_object(config_class)
+    _init_logging(app)
+
+    # Index template names once so themed-template lookups never hit the filesystem
+    _init_template_index(app)
 
     # Validate required configuration
     if not app.config.get('CLERK_PUBLISHABLE_KEY'):
         raise RuntimeError("Please set the CLERK_PUBLISHABLE_KEY in your .env file.")
 
+    # Initialize extensions
+    _init_extensions(app)
+
     # Initialize services and attach to app
     _init_services(app)
 
@@ -57,6 +62,52 @@ def create_app(config_name: str = None) -> Flask:
     return app
 
 
+def _init_logging(app: Flask):
+    """Set the app log level and, if LOG_QUEUE is on, move log output to a background thread."""
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+
+    if not app.config.get('LOG_QUEUE') or default_handler not in app.logger.handlers:
+        return
+
+    # Records are queued on the calling thread; the listener does the blocking write
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, default_handler, respect_handler_level=True)
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def refresh_template_names(app: Flask):
+    """Re-index the template folder into app.template_names (used by get_themed_template)."""
+    app.template_names = frozenset(app.jinja_loader.list_templates())
+    # Per-base-name theme resolutions derived from the index; rebuilt lazily
+    app.themed_templates = {}
+
+
+def _init_template_index(app: Flask):
+    """Build the template index; under the dev server, rebuild it per request so new themes show up."""
+    refresh_template_names(app)
+
+    if app.debug and not app.testing:
+        @app.before_request
+        def _reindex_templates():
+            refresh_template_names(app)
+
+
+def _init_extensions(app: Flask):
+    """Initialize Flask extensions (caching, server-side sessions)."""
+    cache.init_app(app)
+
+    # Keep only a session ID in the cookie and the user data in Redis
+    session_redis_url = app.config.get('SESSION_REDIS_URL')
+    if session_redis_url:
+        from redis import Redis
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = Redis.from_url(session_redis_url)
+        server_session.init_app(app)
+
+
 def _init_services(app: Flask):
     """Initialize and attach services to the Flask app."""
     # Clerk service
@@ -64,11 +115,19 @@ def _init_services(app: Flask):
         secret_key=app.config.get('CLERK_SECRET_KEY')
     )
 
-    # Stripe service
+    # Stripe service (customer lookups and webhook event claims shared across
+    # workers when Redis is configured; claims use their own client and keys)
+    cache_redis_url = app.config.get('CACHE_REDIS_URL')
+    event_store = None
+    if cache_redis_url:
+        from redis import Redis
+        event_store = Redis.from_url(cache_redis_url)
     app.stripe = StripeService(
         secret_key=app.config.get('STRIPE_SECRET_KEY'),
         webhook_secret=app.config.get('STRIPE_WEBHOOK_SECRET'),
-        product_config=app.config.get('STRIPE_PRODUCT_METADATA', {})
+        product_config=app.config.get('STRIPE_PRODUCT_METADATA', {}),
+        customer_cache=app.extensions['cache'][cache] if cache_redis_url else None,
+        event_store=event_store
     )
 
     # OpenAI service
@@ -86,6 +145,15 @@ def _init_services(app: Flask):
     # Challenge service
     app.challenge_service = ChallengeService()
 
+    # Assessment quizzes are class-level data; parse them before the first request
+    AssessmentService.preload()
+
+    # Background workers for fire-and-forget transactional emails
+    app.email_executor = ThreadPoolExecutor(
+        max_workers=app.config.get('EMAIL_WORKERS', 4),
+        thread_name_prefix='email'
+    )
+
 
 def _register_blueprints(app: Flask):
     """Register all blueprints with the Flask app."""
@@ -105,21 +173,20 @@ def _register_context_processor(app: Flask):
     def inject_auth():
         """Inject authentication data into all templates."""
         user = get_current_user()
+        access = get_current_access()
 
-        # Get theme from cookie, default to 'dark' for new TailwindCSS theme
-        theme_mode = request.cookies.get('theme', 'dark')
-        if theme_mode not in ('dark', 'legacy'):
-            theme_mode = 'dark'
+        # Theme from cookie (unknown values fall back to the default dark TailwindCSS theme)
+        theme_mode = get_theme()
 
         return {
             'current_user': user,
             'is_authenticated': user is not None,
-            'has_premium': has_premium_access(user) if user else False,
-            'has_ai_access': has_ai_access(user) if user else False,
-            'has_system_design_access': has_system_design_access(user) if user else False,
-            'has_guides_access': has_guides_access(user) if user else False,
-            'is_allowed': is_allowed_user(user) if user else False,
-            'is_admin': is_admin(user) if user else False,
+            'has_premium': access.premium,
+            'has_ai_access': access.ai,
+            'has_system_design_access': access.system_design,
+            'has_guides_access': access.guides,
+            'is_allowed': access.allowed,
+            'is_admin': access.admin,
             'clerk_publishable_key': app.config.get('CLERK_PUBLISHABLE_KEY'),
             'theme_mode': theme_mode
         }
@@ -2,6 +2,9 @@
 Authentication package for the LeetCode Roadmap Generator.
 """
 from .access import (
+    AccessFlags,
+    compute_access,
+    get_current_access,
     get_current_user,
     has_premium_access,
     has_ai_access,
@@ -16,6 +19,9 @@ from .decorators import (
 )
 
 __all__ = [
+    'AccessFlags',
+    'compute_access',
+    'get_current_access',
     'get_current_user',
     'has_premium_access',
     'has_ai_access',
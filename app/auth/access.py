@@ -1,8 +1,27 @@
 """
 Access checking functions for user authentication and authorization.
 """
-from typing import Optional
-from flask import session, current_app
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+from flask import current_app, g, session
+
+# Shared stand-ins so metadata lookups don't allocate on every miss
+_MISSING = object()
+_EMPTY = MappingProxyType({})
+
+
+class AccessFlags(NamedTuple):
+    """Every access check for one user, computed together by compute_access()."""
+    authenticated: bool = False
+    premium: bool = False
+    ai: bool = False
+    system_design: bool = False
+    guides: bool = False
+    allowed: bool = False
+    admin: bool = False
+
+
+_NO_ACCESS = AccessFlags()
 
 
 def get_current_user() -> Optional[dict]:
@@ -26,13 +45,12 @@ def _get_metadata_value(user_data: dict, key: str, default=False):
         return default
 
     # Check private_metadata first (more secure)
-    private_metadata = user_data.get('private_metadata', {})
-    if private_metadata and key in private_metadata:
-        return private_metadata.get(key, default)
+    value = (user_data.get('private_metadata') or _EMPTY).get(key, _MISSING)
+    if value is not _MISSING:
+        return value
 
     # Fallback to public_metadata for backwards compatibility
-    public_metadata = user_data.get('public_metadata', {})
-    return public_metadata.get(key, default)
+    return (user_data.get('public_metadata') or _EMPTY).get(key, default)
 
 
 def _has_admin_flag(user_data: Optional[dict]) -> bool:
@@ -42,43 +60,34 @@ def _has_admin_flag(user_data: Optional[dict]) -> bool:
     return bool(_get_metadata_value(user_data, 'is_admin', False))
 
 
-def has_premium_access(user_data: Optional[dict]) -> bool:
-    """Check if user has premium access (or is admin)."""
+def _has_flag(user_data: Optional[dict], key: str) -> bool:
+    """Check if user has the given access flag set (or is admin)."""
     if not user_data:
         return False
     if _has_admin_flag(user_data):
         return True
-    return bool(_get_metadata_value(user_data, 'has_premium', False))
+    return bool(_get_metadata_value(user_data, key, False))
+
+
+def has_premium_access(user_data: Optional[dict]) -> bool:
+    """Check if user has premium access (or is admin)."""
+    return _has_flag(user_data, 'has_premium')
 
 
 def has_ai_access(user_data: Optional[dict]) -> bool:
     """Check if user has AI access (or is admin)."""
-    if not user_data:
-        return False
-    if _has_admin_flag(user_data):
-        return True
-    return bool(_get_metadata_value(user_data, 'has_ai_access', False))
+    return _has_flag(user_data, 'has_ai_access')
 
 
 def has_system_design_access(user_data: Optional[dict]) -> bool:
     """Check if user has system design access (or is admin)."""
-    if not user_data:
-        return False
-    if _has_admin_flag(user_data):
-        return True
-    return bool(_get_metadata_value(user_data, 'has_system_design_access', False))
+    return _has_flag(user_data, 'has_system_design_access')
 
 
 def has_guides_access(user_data: Optional[dict]) -> bool:
     """Check if user has guides access (or is admin or has premium)."""
-    if not user_data:
-        return False
-    if _has_admin_flag(user_data):
-        return True
-    # Premium users also get guides access
-    if _get_metadata_value(user_data, 'has_premium', False):
-        return True
-    return bool(_get_metadata_value(user_data, 'has_guides_access', False))
+    # Premium users also get guides access (the admin check runs once, inside _has_flag)
+    return _has_flag(user_data, 'has_premium') or bool(_get_metadata_value(user_data, 'has_guides_access'))
 
 
 def is_allowed_user(user_data: Optional[dict]) -> bool:
@@ -86,20 +95,19 @@ def is_allowed_user(user_data: Optional[dict]) -> bool:
     if not user_data:
         return False
 
-    # Get allowed emails from config
-    allowed_emails = current_app.config.get('ALLOWED_EMAILS', [])
-
-    email_addresses = user_data.get('email_addresses', [])
-    primary_email = ''
-    if email_addresses:
-        primary_email = email_addresses[0].get('email_address', '')
-
+    # Cheap flag check first - skips the email lookup entirely
     public_metadata = user_data.get('public_metadata', {})
+    if public_metadata.get('specialAccess') is True:
+        return True
 
-    return (
-        primary_email in allowed_emails or
-        public_metadata.get('specialAccess') is True
-    )
+    # Session users carry a pre-extracted primary email; raw Clerk payloads don't
+    primary_email = user_data.get('_primary_email')
+    if primary_email is None:
+        email_addresses = user_data.get('email_addresses') or ()
+        primary_email = email_addresses[0].get('email_address', '') if email_addresses else ''
+
+    # Lowercased frozenset in config - O(1) and case-insensitive
+    return primary_email.lower() in current_app.config['ALLOWED_EMAILS']
 
 
 def is_admin(user_data: Optional[dict]) -> bool:
@@ -123,3 +131,63 @@ def is_admin(user_data: Optional[dict]) -> bool:
 
     # Allowed users (from config list) are also considered admins
     return is_allowed_user(user_data)
+
+
+def compute_access(user_data: Optional[dict]) -> AccessFlags:
+    """Compute all access flags in one pass over the user's metadata.
+
+    Equivalent to calling each has_*/is_* check separately, but fetches
+    private_metadata and public_metadata once. Use this where several flags
+    are needed together (e.g. the template context processor).
+
+    Args:
+        user_data: The user data dictionary
+
+    Returns:
+        AccessFlags for the user (all False, including authenticated, when not logged in)
+    """
+    if not user_data:
+        return _NO_ACCESS
+
+    private_metadata = user_data.get('private_metadata') or _EMPTY
+    public_metadata = user_data.get('public_metadata') or _EMPTY
+
+    def flag(key: str) -> bool:
+        value = private_metadata.get(key, _MISSING)
+        if value is _MISSING:
+            value = public_metadata.get(key, False)
+        return bool(value)
+
+    admin_flag = flag('is_admin')
+    premium = admin_flag or flag('has_premium')
+    allowed = is_allowed_user(user_data)
+
+    return AccessFlags(
+        authenticated=True,
+        premium=premium,
+        ai=admin_flag or flag('has_ai_access'),
+        system_design=admin_flag or flag('has_system_design_access'),
+        guides=premium or flag('has_guides_access'),
+        allowed=allowed,
+        admin=admin_flag or allowed
+    )
+
+
+def get_current_access() -> AccessFlags:
+    """Access flags for the current session user, computed once per request.
+
+    Route decorators, the page cache key and the template context processor
+    all need the same flags; the result is memoized on flask.g and reused as
+    long as the session still holds the same user object.
+
+    Returns:
+        AccessFlags for the current user (all False when not logged in)
+    """
+    user = get_current_user()
+    cached = g.get('_auth_access')
+    if cached is not None and cached[0] is user:
+        return cached[1]
+
+    access = compute_access(user)
+    g._auth_access = (user, access)
+    return access
@@ -2,104 +2,63 @@
 Authentication decorators for protecting routes.
 """
 from functools import wraps
+from operator import attrgetter
 from flask import redirect
 
-from .access import (
-    get_current_user,
-    has_premium_access,
-    has_ai_access,
-    has_system_design_access,
-    has_guides_access,
-    is_allowed_user,
-    is_admin
-)
+from .access import get_current_access
 
+# Redirect targets for denied requests. Responses themselves are built per
+# request - WSGI servers may mutate headers, so they can't be shared.
+_LANDING_URL = '/landing'
+_HOME_URL = '/'
 
-def login_required(f):
-    """Require user to be logged in."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-        return f(*args, **kwargs)
-    return decorated_function
 
+def _require(flag=None, denied=_LANDING_URL):
+    """
+    Build a decorator that requires a logged-in user, optionally with access `flag`.
 
-def premium_required(f):
-    """Require user to have premium access."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-
-        if not has_premium_access(user) and not is_admin(user):
-            return redirect('/landing')
-
-        return f(*args, **kwargs)
-    return decorated_function
-
-
-def ai_access_required(f):
-    """Require user to have AI access."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-
-        if not has_ai_access(user) and not is_admin(user):
-            return redirect('/landing')
-
-        return f(*args, **kwargs)
-    return decorated_function
-
-
-def system_design_access_required(f):
-    """Require user to have system design access."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-
-        if not has_system_design_access(user) and not is_admin(user):
-            return redirect('/landing')
-
-        return f(*args, **kwargs)
-    return decorated_function
-
-
-def guides_required(f):
-    """Require user to have guides access."""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-
-        if not has_guides_access(user) and not is_admin(user):
-            return redirect('/landing')
-
-        return f(*args, **kwargs)
-    return decorated_function
-
+    Admins pass every flag check. Logged-out users are always sent to /landing.
 
-def admin_required(f):
-    """Require user to be an admin.
+    Args:
+        flag: AccessFlags field name (e.g. 'premium'), or None to require login only
+        denied: Redirect target for logged-in users without the flag
 
-    Used for admin-only routes like challenge admin dashboard.
-    Redirects non-admins to the home page.
+    Returns:
+        Route decorator that redirects when access is denied
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return redirect('/landing')
-
-        if not is_admin(user):
-            return redirect('/')
-
-        return f(*args, **kwargs)
-    return decorated_function
+    # Resolved once per decorator rather than by name on every request
+    has_flag = attrgetter(flag) if flag is not None else None
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # One memoized lookup answers both "logged in?" and the flag check
+            access = get_current_access()
+            if not access.authenticated:
+                return redirect(_LANDING_URL)
+            # Admins pass every gate, so test that first
+            if has_flag is not None and not (access.admin or has_flag(access)):
+                return redirect(denied)
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+# Require user to be logged in.
+login_required = _require()
+
+# Require user to have premium access.
+premium_required = _require('premium')
+
+# Require user to have AI access.
+ai_access_required = _require('ai')
+
+# Require user to have system design access.
+system_design_access_required = _require('system_design')
+
+# Require user to have guides access.
+guides_required = _require('guides')
+
+# Require user to be an admin. Used for admin-only routes like the challenge
+# admin dashboard; non-admins are sent to the home page.
+admin_required = _require('admin', denied=_HOME_URL)
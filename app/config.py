@@ -2,9 +2,25 @@
 Configuration classes for the LeetCode Roadmap Generator application.
 """
 import os
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 
-load_dotenv()
+
+def _load_env_file():
+    """
+    Load .env for local development.
+
+    Production deploys (FLASK_ENV=production) get real environment variables
+    from the platform, so each worker skips reading and parsing the file.
+    DOTENV_DISABLE skips it in any environment.
+    """
+    if os.environ.get('FLASK_ENV', 'development') == 'production' or os.environ.get('DOTENV_DISABLE'):
+        return
+    load_dotenv()
+
+
+_load_env_file()
 
 
 class Config:
@@ -12,6 +28,9 @@ class Config:
 
     # Flask
     SECRET_KEY = os.environ.get('FLASK_SECRET_KEY', 'your-secret-key-change-this-in-production')
+    # Reject request bodies over 1MB (413) before they are read; the largest
+    # legitimate bodies are Stripe webhook events, well under 100KB
+    MAX_CONTENT_LENGTH = 1 << 20
 
     # Clerk
     CLERK_SECRET_KEY = os.environ.get('CLERK_SECRET_KEY')
@@ -20,6 +39,7 @@ class Config:
     # Stripe
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    EMAIL_WORKERS = 4  # threads sending purchase confirmation emails after the webhook responds
 
     # OpenAI
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -31,43 +51,59 @@ class Config:
     # Server
     PORT = int(os.environ.get('PORT', 5002))
 
-    # Stripe Product Metadata Mapping
-    STRIPE_PRODUCT_METADATA = {
-        'prod_SvD9M0caNlgkfo': {
+    # Logging - debug records are skipped (before formatting) below this level
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Hand log records to a background thread so requests never block on the write
+    LOG_QUEUE = True
+
+    # Caching (Flask-Caching) - use Redis when a URL is provided so workers share entries
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_TYPE = 'RedisCache' if CACHE_REDIS_URL else 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = 300
+    # Namespaces the app's keys so a shared Redis database is never FLUSHDB'd
+    CACHE_KEY_PREFIX = 'roadmap:'
+
+    # Sessions - signed cookies by default, Redis-backed (Flask-Session) when a URL is provided
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL')
+    SESSION_KEY_PREFIX = 'session:'
+
+    # Stripe Product Metadata Mapping (read-only; consumers copy before applying)
+    STRIPE_PRODUCT_METADATA = MappingProxyType({
+        'prod_SvD9M0caNlgkfo': MappingProxyType({
             'has_premium': True,
             'has_ai_access': False,
             'has_system_design_access': False,
             'has_guides_access': False,
             'description': 'Premium Only'
-        },
-        'prod_SzSs6oMiUWlWAn': {
+        }),
+        'prod_SzSs6oMiUWlWAn': MappingProxyType({
             'has_premium': True,
             'has_ai_access': False,
             'has_system_design_access': True,
             'has_guides_access': False,
             'description': 'Premium + System Design'
-        },
-        'prod_SzSqbijjdXdg2a': {
+        }),
+        'prod_SzSqbijjdXdg2a': MappingProxyType({
             'has_premium': True,
             'has_ai_access': False,
             'has_system_design_access': True,
             'has_guides_access': True,
             'description': 'Premium + System Design + Guides'
-        },
-        'prod_ToxWA5I9pXccTZ': {
+        }),
+        'prod_ToxWA5I9pXccTZ': MappingProxyType({
             'has_premium': False,
             'has_ai_access': True,
             'has_system_design_access': False,
             'has_guides_access': False,
             'description': 'Behavioral Guide + AI'
-        }
-    }
+        })
+    })
 
-    # Allowed emails with special access
-    ALLOWED_EMAILS = [
+    # Allowed emails with special access (lowercase; frozenset for O(1) lookups)
+    ALLOWED_EMAILS = frozenset(email.lower() for email in (
         'admin@example.com',
         'raymond@example.com',
-    ]
+    ))
 
     # Month mapping for roadmap display
     MONTH_ORDER = ['April', 'May', 'June', 'July', 'August']
@@ -183,6 +219,7 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     TESTING = False
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
 
 
 class ProductionConfig(Config):
@@ -195,6 +232,7 @@ class TestingConfig(Config):
     """Testing configuration."""
     DEBUG = True
     TESTING = True
+    LOG_QUEUE = False
 
 
 config = {
@@ -205,8 +243,9 @@ config = {
 }
 
 
+@lru_cache(maxsize=1)
 def get_config():
-    """Get configuration based on FLASK_ENV environment variable."""
+    """Get configuration based on FLASK_ENV environment variable (resolved once per process)."""
     env = os.environ.get('FLASK_ENV', 'development')
     if env == 'production':
         return ProductionConfig
@@ -0,0 +1,101 @@
+"""
+Flask extension instances shared across the application.
+
+Extensions are created unbound here and attached in create_app().
+"""
+import threading
+from functools import wraps
+
+from cachelib import RedisCache
+from flask import make_response, request
+from flask_caching import Cache
+from flask_session import Session
+
+from .auth.access import get_current_access
+from .utils.templating import get_theme
+
+# Page/response cache (SimpleCache by default, RedisCache when CACHE_REDIS_URL is set)
+cache = Cache()
+
+# Key namespaces of rendered pages and cached API bodies (see clear_page_cache)
+PAGE_CACHE_KEY_PREFIXES = ('page:', 'api:')
+
+# Page/API keys issued by this process, so the in-process cache can be cleared
+# without reading its private storage (Redis is cleared by scanning instead)
+_issued_page_keys = set()
+_issued_page_keys_lock = threading.Lock()
+
+# Past this many tracked keys, drop the ones the cache has already evicted
+_ISSUED_PAGE_KEYS_LIMIT = 2000
+
+# Server-side sessions (only initialised when SESSION_REDIS_URL is set)
+server_session = Session()
+
+
+def page_cache_key():
+    """
+    Cache key for rendered pages.
+
+    Rendered output only varies by path, theme and the viewer's access flags,
+    so users with the same flags share one cached page.
+    """
+    flags = ''.join('1' if flag else '0' for flag in get_current_access())
+    return remember_page_cache_key(f"page:{request.path}:{get_theme()}:{flags}")
+
+
+def remember_page_cache_key(key):
+    """Record a page/API cache key for clear_page_cache and return it unchanged."""
+    if key in _issued_page_keys:
+        return key
+    backend = cache.cache
+    if isinstance(backend, RedisCache):
+        return key
+    with _issued_page_keys_lock:
+        _issued_page_keys.add(key)
+        if len(_issued_page_keys) > _ISSUED_PAGE_KEYS_LIMIT:
+            _issued_page_keys.difference_update([k for k in _issued_page_keys if not backend.has(k)])
+    return key
+
+
+def clear_page_cache():
+    """
+    Drop every cached page and API body, leaving other cache entries alone.
+
+    cache.clear() would also drop shared entries such as Stripe customer
+    emails (and, on Redis without a key prefix, FLUSHDB the whole database),
+    so only the PAGE_CACHE_KEY_PREFIXES namespaces are deleted: by a SCAN on
+    Redis, and from the keys recorded by remember_page_cache_key otherwise.
+    """
+    backend = cache.cache
+    if isinstance(backend, RedisCache):
+        client = backend._write_client
+        for prefix in PAGE_CACHE_KEY_PREFIXES:
+            keys = list(client.scan_iter(match=f'{backend.key_prefix}{prefix}*'))
+            if keys:
+                client.delete(*keys)
+    else:
+        with _issued_page_keys_lock:
+            keys = list(_issued_page_keys)
+            _issued_page_keys.clear()
+        if keys:
+            backend.delete_many(*keys)
+
+
+def conditional_page(view):
+    """
+    Answer repeat visits to a page with 304 Not Modified.
+
+    Applied outside `cache.cached`, so the cached response is tagged with a
+    hash of its body and compared against the browser's If-None-Match; a
+    revalidating browser then gets headers only instead of the full page.
+    Pages vary by the auth and theme cookies, hence `Vary: Cookie`.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        response.add_etag()
+        response.vary.add('Cookie')
+        return response.make_conditional(request)
+    return wrapper
@@ -0,0 +1,51 @@
+"""
+JSON provider for serializing application models in API responses.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Dataclasses and datetimes go through default() so output matches Flask's
+# encoder (to_dict() for models, HTTP dates for datetimes)
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+)
+
+# Keyword arguments Flask and Jinja's tojson pass that orjson can honour
+_ORJSON_KWARGS = frozenset({'indent', 'separators', 'sort_keys'})
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson that also serializes models exposing `to_dict()`.
+
+    Calls with options orjson has no equivalent for (e.g. indent=4) fall back
+    to the stdlib encoder.
+    """
+
+    @staticmethod
+    def default(o):
+        """Serialize models via to_dict, falling back to Flask's defaults."""
+        if hasattr(o, 'to_dict'):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize obj to a JSON string."""
+        indent = kwargs.get('indent')
+        if indent not in (None, 2) or not _ORJSON_KWARGS.issuperset(kwargs):
+            return super().dumps(obj, **kwargs)
+
+        option = _ORJSON_OPTIONS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes."""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
@@ -1,6 +1,7 @@
 """
 Models package for the LeetCode Roadmap Generator.
 """
-from .course import Course, COURSES
+from .course import Course, COURSES, SORTED_COURSES
+from .problem import Problem
 
-__all__ = ['Course', 'COURSES']
+__all__ = ['Course', 'COURSES', 'SORTED_COURSES', 'Problem']
@@ -1,13 +1,14 @@
 """
 Course model and data definitions.
 """
-from dataclasses import dataclass, asdict
-from typing import List
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Mapping, Tuple
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Course:
-    """Represents a course/learning path in the application."""
+    """Represents a course/learning path in the application (immutable, shared across threads)."""
     title: str
     description: str
     route: str
@@ -24,7 +25,23 @@ class Course:
 
     def to_dict(self) -> dict:
         """Convert course to dictionary for template rendering."""
-        return asdict(self)
+        # Explicit literal - every field is an immutable scalar, so asdict()'s
+        # recursive deep copy is unnecessary
+        return {
+            'title': self.title,
+            'description': self.description,
+            'route': self.route,
+            'icon': self.icon,
+            'label': self.label,
+            'is_premium': self.is_premium,
+            'course_type': self.course_type,
+            'duration': self.duration,
+            'problem_count': self.problem_count,
+            'level': self.level,
+            'order': self.order,
+            'image_url': self.image_url,
+            'access_type': self.access_type
+        }
 
 
 # All course definitions
@@ -227,7 +244,13 @@ COURSES: List[Course] = [
 ]
 
 
+# Course data never changes at runtime, so sort and convert once at import.
+# Read-only so it can be shared directly (e.g. by the classroom page).
+SORTED_COURSES: Tuple[Mapping, ...] = tuple(
+    MappingProxyType(course.to_dict()) for course in sorted(COURSES, key=lambda x: x.order)
+)
+
+
 def get_sorted_courses() -> List[dict]:
-    """Get all courses sorted by order, as dictionaries."""
-    sorted_courses = sorted(COURSES, key=lambda x: x.order)
-    return [course.to_dict() for course in sorted_courses]
+    """Get all courses sorted by order, as dictionaries (fresh copies callers may modify)."""
+    return [dict(course) for course in SORTED_COURSES]
@@ -0,0 +1,40 @@
+"""
+Roadmap problem model.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Problem:
+    """A single problem in a roadmap day.
+
+    Slotted so the ~900 problems held in memory don't each carry a dict.
+    """
+    name: str
+    url: str = ''
+    status: str = ''
+    solved: bool = False
+    note: str = ''
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Problem':
+        """Build a problem from its roadmap JSON representation."""
+        return cls(
+            name=data.get('name', 'Unknown Problem'),
+            url=data.get('url', ''),
+            status=data.get('status', ''),
+            solved=data.get('solved', False),
+            note=data.get('note', '')
+        )
+
+    def to_dict(self) -> dict:
+        """Convert problem back to its roadmap JSON representation."""
+        data = {
+            'name': self.name,
+            'status': self.status,
+            'solved': self.solved,
+            'url': self.url
+        }
+        if self.note:
+            data['note'] = self.note
+        return data
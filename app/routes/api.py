@@ -1,14 +1,31 @@
 """
 API routes blueprint.
 """
-import re
+import copy
+import json
 from datetime import datetime
-from urllib.parse import urlparse
 
-from flask import Blueprint, jsonify, request, current_app
+import orjson
+from werkzeug.http import generate_etag
+from flask import Blueprint, Response, jsonify, request, current_app, session, stream_with_context
 
 from ..auth.decorators import ai_access_required, login_required, admin_required
 from ..auth.access import get_current_user
+from ..extensions import cache, clear_page_cache, remember_page_cache_key
+from ..utils.date_utils import today_iso
+
+# Submitted URLs longer than this are rejected before any validation
+MAX_SUBMITTED_URL_LENGTH = 2048
+
+# Anchored prefixes, so validation looks only at the start of user input
+SKOOL_URL_PREFIXES = (
+    'https://skool.com/', 'https://www.skool.com/',
+    'http://skool.com/', 'http://www.skool.com/'
+)
+LEETCODE_PROBLEM_URL_PREFIXES = (
+    'https://leetcode.com/problems/', 'https://www.leetcode.com/problems/',
+    'http://leetcode.com/problems/', 'http://www.leetcode.com/problems/'
+)
 
 
 def extract_leetcode_slug(url):
@@ -23,30 +40,61 @@ def extract_leetcode_slug(url):
 
     Returns the slug (e.g., 'two-sum') or None if not found.
     """
-    parsed = urlparse(url)
-    path = parsed.path
+    # Only the path counts, so drop any query string or fragment first
+    path = url.split('?', 1)[0].split('#', 1)[0]
 
     # Match pattern: /problems/{slug}/ - capture just the slug part
-    match = re.search(r'/problems/([^/?]+)', path)
-    if match:
-        return match.group(1)
-    return None
+    _, found, rest = path.partition('/problems/')
+    if not found:
+        return None
+    return rest.split('/', 1)[0] or None
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Bodies of endpoints whose JSON never changes, encoded once at import
+_TEST_BODY = orjson.dumps({'status': 'API working', 'message': 'Test successful'})
+_LEADERBOARD_BODY = orjson.dumps({'leaderboard': [], 'message': 'Leaderboard coming soon'})
+_PARTICIPANTS_BODY = orjson.dumps({'participants': [], 'message': 'Admin participant list coming soon'})
+
+
+def _static_json_response(body):
+    """Wrap a pre-encoded JSON body in a response without re-serializing."""
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def _cached_json_response(key, build):
+    """
+    Serve JSON whose body is encoded once and cached (cleared by /refresh).
+
+    Args:
+        key: Cache key for the encoded body and its ETag
+        build: Callable returning the data to encode on a cache miss
+
+    Returns:
+        JSON response, or 304 Not Modified when the client's ETag matches
+    """
+    cached = cache.get(remember_page_cache_key(key))
+    if cached is None:
+        body = current_app.json.dumps(build())
+        cached = (body, generate_etag(body.encode()))
+        cache.set(key, cached)
+
+    body, etag = cached
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
 
 @api_bp.route('/roadmap')
 def roadmap():
     """API endpoint to get roadmap data."""
-    roadmap_service = current_app.roadmap
-    return jsonify(roadmap_service.get_ordered_roadmap_data())
+    return _cached_json_response('api:roadmap', current_app.roadmap.get_ordered_roadmap_data)
 
 
 @api_bp.route('/atcoder')
 def atcoder():
     """API endpoint to get AtCoder beginner problems."""
-    roadmap_service = current_app.roadmap
-    return jsonify(roadmap_service.get_atcoder_problems())
+    return _cached_json_response('api:atcoder', current_app.roadmap.get_atcoder_problems)
 
 
 @api_bp.route('/refresh', methods=['POST'])
@@ -56,6 +104,8 @@ def refresh():
     try:
         roadmap_service = current_app.roadmap
         roadmap_service.refresh_data()
+        # Rendered roadmap pages and cached API bodies are stale now
+        clear_page_cache()
         return jsonify({'status': 'success', 'message': 'Roadmap data refreshed'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
@@ -64,7 +114,7 @@ def refresh():
 @api_bp.route('/test', methods=['GET'])
 def test():
     """Simple test endpoint."""
-    return jsonify({'status': 'API working', 'message': 'Test successful'})
+    return _static_json_response(_TEST_BODY)
 
 
 @api_bp.route('/behavioral-feedback', methods=['POST'])
@@ -72,18 +122,12 @@ def test():
 def behavioral_feedback():
     """API endpoint to get behavioral story feedback using OpenAI - AI Access Required."""
     try:
-        print("Received behavioral feedback request")
         data = request.get_json()
-        print(f"Request data: {data}")
 
         question = data.get('question', '')
         story = data.get('story', '')
 
-        print(f"Question: {question[:50]}...")
-        print(f"Story length: {len(story)}")
-
         if not question or not story:
-            print("Missing question or story")
             return jsonify({'error': 'Question and story are required'}), 400
 
         # Get feedback from OpenAI service
@@ -96,12 +140,52 @@ def behavioral_feedback():
         })
 
     except Exception as e:
+        current_app.logger.error("Behavioral feedback failed: %s", e)
         return jsonify({
             'error': f'Failed to get feedback: {str(e)}',
             'status': 'error'
         }), 500
 
 
+@api_bp.route('/behavioral-feedback/stream', methods=['POST'])
+@ai_access_required
+def behavioral_feedback_stream():
+    """
+    Stream behavioral story feedback as server-sent events - AI Access Required.
+
+    Emits `data: {"delta": "..."}` events as text arrives, then `data: [DONE]`.
+    Errors after the stream has started arrive as `data: {"error": "..."}`.
+    """
+    data = request.get_json(silent=True) or {}
+    question = data.get('question', '')
+    story = data.get('story', '')
+
+    if not question or not story:
+        return jsonify({'error': 'Question and story are required'}), 400
+
+    openai_service = current_app.openai
+    if not openai_service.is_configured():
+        return jsonify({
+            'error': 'Failed to get feedback: OpenAI API key not configured',
+            'status': 'error'
+        }), 500
+
+    def generate():
+        try:
+            for delta in openai_service.stream_behavioral_feedback(question, story):
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+        except Exception as e:
+            current_app.logger.error("Behavioral feedback stream failed: %s", e)
+            yield f"data: {json.dumps({'error': f'Failed to get feedback: {e}'})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 # =============================================================================
 # Challenge API Endpoints
 # =============================================================================
@@ -114,9 +198,10 @@ def enroll_challenge():
     user_id = user.get('id')
 
     # Initialize challenge data
+    now_iso = datetime.now().isoformat()
     challenge_data = {
         'enrolled': True,
-        'start_date': datetime.now().isoformat(),
+        'start_date': now_iso,
         'days_completed': [],
         'problems_solved': {},
         'total_problems_solved': 0,
@@ -124,7 +209,7 @@ def enroll_challenge():
         'best_streak': 0,
         'points': 0,
         'achievements': [],
-        'last_activity_date': datetime.now().isoformat()
+        'last_activity_date': now_iso
     }
 
     # Update Clerk metadata (only public, preserve private)
@@ -153,7 +238,8 @@ def complete_problem():
     user = get_current_user()
     user_id = user.get('id')
     public_meta = user.get('public_metadata', {})
-    challenge = public_meta.get('challenge', {})
+    # Work on a copy so the session only changes once Clerk has the write
+    challenge = copy.deepcopy(public_meta.get('challenge', {}))
 
     if not challenge.get('enrolled'):
         return jsonify({'error': 'Not enrolled in challenge'}), 400
@@ -167,10 +253,14 @@ def complete_problem():
     if problem_id not in problems_solved[day_key]:
         problems_solved[day_key].append(problem_id)
         challenge['problems_solved'] = problems_solved
-        challenge['total_problems_solved'] = sum(len(p) for p in problems_solved.values())
+        # Re-derived so a stale or missing stored total can't drift further
+        challenge['total_problems_solved'] = sum(len(v) for v in problems_solved.values())
+
+        # One clock read, so the log date and last_activity_date always agree
+        now = datetime.now()
 
         # Track activity in activity_log for heatmap
-        today = datetime.now().date().isoformat()
+        today = now.date().isoformat()
         activity_log = challenge.get('activity_log', {})
         if today not in activity_log:
             activity_log[today] = {'count': 0, 'problems': []}
@@ -180,11 +270,13 @@ def complete_problem():
 
         # Check if day is complete
         service = current_app.challenge_service
+        day_newly_completed = False
         if service.is_day_complete(day, problems_solved):
             days_completed = challenge.get('days_completed', [])
             if day not in days_completed:
                 days_completed.append(day)
                 challenge['days_completed'] = days_completed
+                day_newly_completed = True
 
         # Update streak
         current_day = service.calculate_current_day(challenge.get('start_date', ''))
@@ -202,16 +294,33 @@ def complete_problem():
         # Check for new achievements
         new_achievements = service.check_achievements(challenge)
         if new_achievements:
-            challenge['achievements'] = list(
-                set(challenge.get('achievements', []) + new_achievements)
-            )
+            # check_achievements only returns IDs not already earned, so appending
+            # keeps unlock order stable across saves
+            challenge['achievements'] = challenge.get('achievements', []) + new_achievements
+
+        challenge['last_activity_date'] = now.isoformat()
+
+        # Send Clerk only what changed; nested dicts are deep-merged server-side
+        changes = {
+            'problems_solved': {day_key: problems_solved[day_key]},
+            'total_problems_solved': challenge['total_problems_solved'],
+            'activity_log': {today: activity_log[today]},
+            'current_streak': challenge['current_streak'],
+            'best_streak': challenge['best_streak'],
+            'points': challenge['points'],
+            'last_activity_date': challenge['last_activity_date']
+        }
+        if day_newly_completed:
+            changes['days_completed'] = challenge['days_completed']
+        if new_achievements:
+            changes['achievements'] = challenge['achievements']
 
-        challenge['last_activity_date'] = datetime.now().isoformat()
+        clerk_service = current_app.clerk
+        if not clerk_service.merge_user_metadata(user_id, public_metadata={'challenge': changes}):
+            return jsonify({'error': 'Failed to save progress'}), 500
 
-        # Save to Clerk (only public, preserve private)
         public_meta['challenge'] = challenge
-        clerk_service = current_app.clerk
-        clerk_service.update_user_metadata(user_id, public_metadata=public_meta)
+        session.modified = True
 
         return jsonify({
             'status': 'success',
@@ -256,10 +365,13 @@ def submit_skool():
     day = data.get('day')
     url = data.get('url')
 
-    if not day or not url:
+    if not day or not isinstance(url, str) or not url:
         return jsonify({'error': 'day and url required'}), 400
 
-    if 'skool.com' not in url:
+    if len(url) > MAX_SUBMITTED_URL_LENGTH:
+        return jsonify({'error': 'URL too long'}), 400
+
+    if not url.startswith(SKOOL_URL_PREFIXES):
         return jsonify({'error': 'Invalid Skool URL'}), 400
 
     user = get_current_user()
@@ -291,7 +403,10 @@ def submit_bonus_problem():
     if not url:
         return jsonify({'error': 'URL required'}), 400
 
-    if 'leetcode.com/problems/' not in url:
+    if len(url) > MAX_SUBMITTED_URL_LENGTH:
+        return jsonify({'error': 'URL too long'}), 400
+
+    if not url.startswith(LEETCODE_PROBLEM_URL_PREFIXES):
         return jsonify({'error': 'Invalid LeetCode problem URL'}), 400
 
     user = get_current_user()
@@ -305,30 +420,35 @@ def submit_bonus_problem():
     # Get existing bonus problems
     bonus_problems = challenge.get('bonus_problems', [])
 
-    # Check if already added
-    existing_urls = [p.get('url') for p in bonus_problems]
-    # Normalize URL for comparison (remove trailing slash)
-    normalized_url = url.rstrip('/')
-    if any(existing.rstrip('/') == normalized_url for existing in existing_urls):
-        return jsonify({'status': 'already_added'})
-
     # Extract problem slug from URL (handles /description/ and query params)
     problem_slug = extract_leetcode_slug(url)
     if not problem_slug:
         return jsonify({'error': 'Could not extract problem name from URL'}), 400
+
+    # Check if already added: the slug identifies the problem whatever the URL
+    # variant (stored on new entries; older ones are parsed from their URL)
+    existing_slugs = {
+        p.get('slug') or extract_leetcode_slug(p.get('url', ''))
+        for p in bonus_problems
+    }
+    if problem_slug in existing_slugs:
+        return jsonify({'status': 'already_added'})
+
     problem_name = problem_slug.replace('-', ' ').title()
 
     # Add new bonus problem
+    now = datetime.now()
     bonus_problems.append({
         'url': url,
+        'slug': problem_slug,
         'name': problem_name,
-        'added_at': datetime.now().isoformat()
+        'added_at': now.isoformat()
     })
 
     challenge['bonus_problems'] = bonus_problems
 
     # Track activity in activity_log for heatmap
-    today = datetime.now().date().isoformat()
+    today = now.date().isoformat()
     activity_log = challenge.get('activity_log', {})
     if today not in activity_log:
         activity_log[today] = {'count': 0, 'problems': []}
@@ -356,10 +476,7 @@ def submit_bonus_problem():
 def get_challenge_leaderboard():
     """Get challenge leaderboard data."""
     # For now, return empty - would need Clerk API to list all users
-    return jsonify({
-        'leaderboard': [],
-        'message': 'Leaderboard coming soon'
-    })
+    return _static_json_response(_LEADERBOARD_BODY)
 
 
 @api_bp.route('/challenge/admin/participants')
@@ -367,10 +484,7 @@ def get_challenge_leaderboard():
 def get_challenge_participants():
     """Get all challenge participants (admin only)."""
     # Would require Clerk API to list all users with challenge data
-    return jsonify({
-        'participants': [],
-        'message': 'Admin participant list coming soon'
-    })
+    return _static_json_response(_PARTICIPANTS_BODY)
 
 
 @api_bp.route('/challenge/admin/approve-submission', methods=['POST'])
@@ -403,7 +517,10 @@ def submit_skool_proof():
     if not url:
         return jsonify({'error': 'URL required'}), 400
 
-    if 'skool.com' not in url:
+    if len(url) > MAX_SUBMITTED_URL_LENGTH:
+        return jsonify({'error': 'URL too long'}), 400
+
+    if not url.startswith(SKOOL_URL_PREFIXES):
         return jsonify({'error': 'Please provide a valid Skool URL'}), 400
 
     user = get_current_user()
@@ -433,18 +550,20 @@ def stripe_webhook():
     """
     Stripe webhook handler for subscription events.
     Auto-provisions users in Clerk when payments complete.
+
+    Access is granted or revoked before responding, so a failure returns
+    500 and Stripe redelivers the event; only the confirmation email is
+    sent in the background.
     """
     payload = request.get_data()
     sig_header = request.headers.get('Stripe-Signature')
-
-    print("Received Stripe webhook")
+    logger = current_app.logger
 
     stripe_service = current_app.stripe
-    clerk_service = current_app.clerk
 
     # Verify webhook signature
     if not stripe_service.is_webhook_configured():
-        print("STRIPE_WEBHOOK_SECRET not configured")
+        logger.error("STRIPE_WEBHOOK_SECRET not configured")
         return jsonify({'error': 'Webhook secret not configured'}), 200
 
     event = stripe_service.verify_webhook(payload, sig_header)
@@ -453,78 +572,108 @@ def stripe_webhook():
 
     # Get event type
     event_type = event.get('type')
-    print(f"Processing event type: {event_type}")
 
     # Check if supported event
     if not stripe_service.is_supported_event(event_type):
-        print(f"Ignoring event type: {event_type}")
+        logger.debug("Ignoring Stripe event type: %s", event_type)
         return jsonify({'status': 'ignored'}), 200
 
-    # Extract customer email
-    customer_email = stripe_service.extract_customer_email(event)
-    if not customer_email:
-        print("Could not extract customer email")
-        return jsonify({'status': 'error', 'reason': 'no email'}), 200
+    # Stripe delivers at-least-once; only the first delivery of an event is processed
+    event_id = event.get('id')
+    if event_id and not stripe_service.claim_event(event_id):
+        logger.info("Stripe %s %s already processed", event_type, event_id)
+        return jsonify({'status': 'duplicate'}), 200
 
-    print(f"Customer email: {customer_email}")
+    try:
+        body, status = _process_stripe_event(event)
+    except Exception as e:
+        logger.exception("Error processing Stripe %s webhook: %s", event_type, e)
+        body, status = {'status': 'error', 'reason': 'processing error'}, 500
 
-    # Extract product ID
-    product_id = stripe_service.extract_product_id(event)
-    if not product_id:
-        print("Could not extract product ID")
-        return jsonify({'status': 'error', 'reason': 'no product'}), 200
+    # Let Stripe's retry of a failed event through instead of treating it as a duplicate
+    if status >= 500 and event_id:
+        stripe_service.release_event(event_id)
+    return jsonify(body), status
 
-    print(f"Product ID: {product_id}")
 
-    # Handle subscription deletion (revoke access)
-    if event_type == 'customer.subscription.deleted':
-        print(f"Subscription deleted for {customer_email}")
-        clerk_service.revoke_user_access(customer_email)
-        return jsonify({'status': 'success', 'action': 'revoked'}), 200
+def _process_stripe_event(event):
+    """
+    Provision or revoke Clerk access for a verified Stripe event.
 
-    # Provision user
-    try:
-        product_metadata = stripe_service.get_product_metadata(product_id)
-        success = clerk_service.provision_user(customer_email, product_metadata)
-
-        if success:
-            product_desc = stripe_service.get_product_description(product_id)
-            print(f"Successfully provisioned {customer_email} with {product_desc}")
-
-            # Send purchase confirmation email
-            try:
-                from ..services.email_service import EmailService
-                email_result = EmailService.send_purchase_confirmation_email(
-                    to=customer_email,
-                    product_name=product_desc
-                )
-                if email_result['success']:
-                    print(f"Purchase confirmation email sent to {customer_email}")
-                else:
-                    print(f"Failed to send email: {email_result.get('error')}")
-            except Exception as email_error:
-                print(f"Email sending error (non-fatal): {str(email_error)}")
-
-            return jsonify({
-                'status': 'success',
-                'email': customer_email,
-                'product': product_desc
-            }), 200
-        else:
-            print(f"Failed to provision {customer_email}")
-            return jsonify({'status': 'error', 'reason': 'provision failed'}), 200
+    Returns:
+        (response body, status); 500 when Clerk wasn't updated, so Stripe retries
+    """
+    logger = current_app.logger
+    stripe_service = current_app.stripe
+    clerk_service = current_app.clerk
+    event_type = event.get('type')
 
-    except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'status': 'error', 'reason': str(e)}), 200
+    # Extract customer email and the product of every line item
+    customer_email, product_ids = stripe_service.extract_customer_and_products(event)
+    if not customer_email:
+        logger.warning("Stripe %s: could not extract customer email", event_type)
+        return {'status': 'error', 'reason': 'no email'}, 200
+
+    if not product_ids:
+        logger.warning("Stripe %s for %s: could not extract product ID", event_type, customer_email)
+        return {'status': 'error', 'reason': 'no product'}, 200
+
+    # Handle subscription deletion (revoke access)
+    if event_type == 'customer.subscription.deleted':
+        logger.info("Stripe %s: revoking access for %s", event_type, customer_email)
+        if not clerk_service.revoke_user_access(customer_email):
+            logger.error("Stripe %s: failed to revoke access for %s", event_type, customer_email)
+            return {'status': 'error', 'reason': 'revoke failed'}, 500
+        return {'status': 'success', 'action': 'revoked'}, 200
+
+    # Provision user with every purchased product (merged into one Clerk write)
+    products_metadata = [stripe_service.get_product_metadata(product_id) for product_id in product_ids]
+    results = clerk_service.provision_users([(customer_email, metadata) for metadata in products_metadata])
+    if not results.get(customer_email):
+        logger.error("Stripe %s: failed to provision %s", event_type, customer_email)
+        return {'status': 'error', 'reason': 'provision failed'}, 500
+
+    # Same lookup get_product_description() would repeat
+    product_desc = ', '.join(dict.fromkeys(
+        metadata.get('description', product_id) for product_id, metadata in zip(product_ids, products_metadata)
+    ))
+    logger.info("Stripe %s: provisioned %s with %s (%s)",
+                event_type, customer_email, product_desc, ', '.join(product_ids))
+
+    # Access is already granted; the confirmation email needn't hold up Stripe's delivery
+    current_app.email_executor.submit(
+        _send_purchase_email, current_app._get_current_object(), customer_email, product_desc
+    )
+    return {'status': 'success', 'email': customer_email, 'product': product_desc}, 200
+
+
+def _send_purchase_email(app, customer_email, product_desc):
+    """Send the purchase confirmation email (runs on an email worker thread)."""
+    with app.app_context():
+        try:
+            from ..services.email_service import EmailService
+            email_result = EmailService.send_purchase_confirmation_email(
+                to=customer_email,
+                product_name=product_desc
+            )
+            if not email_result['success']:
+                app.logger.warning("Failed to send purchase email to %s: %s",
+                                   customer_email, email_result.get('error'))
+        except Exception as email_error:
+            app.logger.warning("Email sending error (non-fatal): %s", email_error)
 
 
 # =============================================================================
 # Daily Progress Trackers
 # =============================================================================
 
+# Trackers whose daily values add up into running totals
+CUMULATIVE_TRACKER_KEYS = (
+    'new_problems', 'revised_problems', 'github_commits',
+    'skool_activity', 'comments_done', 'social_posts', 'mock_interviews'
+)
+
+
 @api_bp.route('/challenge/log-activity', methods=['POST'])
 @login_required
 def log_daily_activity():
@@ -551,44 +700,46 @@ def log_daily_activity():
         'leetcode_rank': None
     }
 
-    # Initialize trackers if needed
-    trackers = challenge.get('trackers', default_trackers.copy())
+    # Work on copies so the session only changes once Clerk has the write
+    trackers = dict(challenge.get('trackers') or default_trackers)
     tracker_log = challenge.get('tracker_log', {})
 
-    today = datetime.now().date().isoformat()
+    today = today_iso()
 
     # Get previous entry for today (if updating)
     previous_entry = tracker_log.get(today, {})
 
-    # Cumulative tracker keys
-    cumulative_keys = [
-        'new_problems', 'revised_problems', 'github_commits',
-        'skool_activity', 'comments_done', 'social_posts', 'mock_interviews'
-    ]
+    # Today's log entry (missing or null counts are stored as 0)
+    entry = {key: data.get(key) or 0 for key in CUMULATIVE_TRACKER_KEYS}
+    leetcode_rank = data.get('leetcode_rank')
+    if leetcode_rank:
+        entry['leetcode_rank'] = leetcode_rank
+
+    # Resubmitting today's values changes nothing, so skip the Clerk write
+    if entry == previous_entry:
+        return jsonify({'status': 'success', 'trackers': trackers})
 
     # Update cumulative totals (add delta from previous entry)
-    for key in cumulative_keys:
-        old_value = previous_entry.get(key, 0) or 0
-        new_value = data.get(key, 0) or 0
-        delta = new_value - old_value
-        trackers[key] = (trackers.get(key, 0) or 0) + delta
+    for key in CUMULATIVE_TRACKER_KEYS:
+        trackers[key] = (trackers.get(key) or 0) + entry[key] - (previous_entry.get(key) or 0)
 
     # LeetCode rank is just stored directly (not cumulative)
-    if 'leetcode_rank' in data and data['leetcode_rank']:
-        trackers['leetcode_rank'] = data['leetcode_rank']
+    if leetcode_rank:
+        trackers['leetcode_rank'] = leetcode_rank
 
-    # Store today's log entry
-    tracker_log[today] = {key: data.get(key, 0) for key in cumulative_keys}
-    if data.get('leetcode_rank'):
-        tracker_log[today]['leetcode_rank'] = data['leetcode_rank']
-
-    # Save back to metadata
-    challenge['trackers'] = trackers
-    challenge['tracker_log'] = tracker_log
-
-    # Update Clerk (only public, preserve private)
-    public_meta['challenge'] = challenge
+    # Merge only what changed into Clerk (Clerk deep-merges, so other days'
+    # log entries and the rest of public_metadata are untouched)
     clerk_service = current_app.clerk
-    clerk_service.update_user_metadata(user_id, public_metadata=public_meta)
+    result = clerk_service.merge_user_metadata(
+        user_id,
+        public_metadata={'challenge': {'trackers': trackers, 'tracker_log': {today: entry}}}
+    )
+    if not result:
+        return jsonify({'error': 'Failed to save activity'}), 500
+
+    # Clerk has the write; now bring the session copy in line with it
+    challenge['trackers'] = trackers
+    challenge['tracker_log'] = {**tracker_log, today: entry}
+    session.modified = True
 
     return jsonify({'status': 'success', 'trackers': trackers})
@@ -1,40 +1,34 @@
 """
 Authentication routes blueprint.
 """
-import os
-from flask import Blueprint, render_template, jsonify, request, redirect, session, current_app
+from flask import Blueprint, render_template, jsonify, request, redirect, session, current_app, abort
 
-from ..auth.access import (
-    get_current_user,
-    has_premium_access,
-    has_ai_access,
-    has_system_design_access,
-    is_allowed_user
-)
+from ..auth.access import get_current_user, compute_access
+from ..utils.templating import get_themed_template
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 
-def get_themed_template(base_name):
-    """Return the themed template name based on user preference.
-
-    Args:
-        base_name: Base template name without extension (e.g., 'auth/login')
-
-    Returns:
-        Template filename with appropriate suffix based on theme cookie
+def _session_user(user_data: dict) -> dict:
     """
-    theme = request.cookies.get('theme', 'dark')
-
-    if theme == 'dark':
-        tw_template = f'{base_name}_tw.html'
-        # Check if TailwindCSS template exists using absolute path
-        template_path = os.path.join(current_app.root_path, current_app.template_folder, tw_template)
-        if os.path.exists(template_path):
-            return tw_template
+    Project a Clerk user payload down to the fields the app reads.
 
-    # Fall back to legacy template
-    return f'{base_name}.html'
+    The session lives in a signed cookie that is sent and verified on every
+    request, so unused fields (organization memberships, extra email
+    addresses, ...) are dropped before storing it.
+    """
+    email_addresses = user_data.get('email_addresses') or []
+    primary_email = email_addresses[0].get('email_address', '') if email_addresses else ''
+    return {
+        'id': user_data.get('id'),
+        'email_addresses': [{'email_address': primary_email}] if email_addresses else [],
+        # Flat copy read by access checks on every request
+        '_primary_email': primary_email,
+        'first_name': user_data.get('first_name'),
+        'last_name': user_data.get('last_name'),
+        'private_metadata': user_data.get('private_metadata') or {},
+        'public_metadata': user_data.get('public_metadata') or {}
+    }
 
 
 @auth_bp.route('/login')
@@ -51,8 +45,8 @@ def callback():
         user_data = data.get('user')
 
         if user_data:
-            # Store user data in Flask session
-            session['user'] = user_data
+            # Store a compact copy of the user in the Flask session
+            session['user'] = _session_user(user_data)
             return jsonify({'status': 'success'})
 
         return jsonify({'status': 'error', 'message': 'No user data provided'}), 400
@@ -75,14 +69,19 @@ def status():
 
 @auth_bp.route('/debug')
 def debug():
-    """Debug authentication state (for development)."""
+    """Debug authentication state (development only - 404 when DEBUG is off)."""
+    if not current_app.debug:
+        abort(404)
+
     user = get_current_user()
+    access = compute_access(user)
     return jsonify({
         'authenticated': user is not None,
         'user_data': user,
-        'has_premium': has_premium_access(user),
-        'has_ai_access': has_ai_access(user),
-        'has_system_design_access': has_system_design_access(user),
-        'is_allowed': is_allowed_user(user),
-        'session_data': dict(session)
+        'has_premium': access.premium,
+        'has_ai_access': access.ai,
+        'has_system_design_access': access.system_design,
+        'is_allowed': access.allowed,
+        # Key names only - the user blob is already returned above
+        'session_keys': sorted(session.keys())
     })
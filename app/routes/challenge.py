@@ -8,35 +8,32 @@ Provides routes for:
 - Leaderboard
 - Admin dashboard and submission management
 """
-import os
-from datetime import datetime, timedelta
-from flask import Blueprint, render_template, redirect, current_app, request
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Tuple
+from flask import Blueprint, render_template, redirect, current_app
 
 from ..auth.decorators import login_required, admin_required
 from ..auth.access import get_current_user, is_admin
+from ..utils.templating import get_themed_template
 
 
-def get_themed_template(base_name):
+@lru_cache(maxsize=2)
+def _heatmap_days(today: date) -> Tuple[Tuple[str, int], ...]:
     """
-    Get the appropriate template based on user's theme preference.
+    (ISO date, weekday) pairs for the year ending today.
 
-    Args:
-        base_name: Base template name without extension (e.g., 'challenge/index')
-
-    Returns:
-        Template path based on theme ('dark' = *_tw.html, 'legacy' = *.html)
+    Only depends on the date, so it is built once per day and shared by every
+    user; per-user activity counts are filled in at request time.
     """
-    theme = request.cookies.get('theme', 'dark')
-
-    if theme == 'dark':
-        tw_template = f"{base_name}_tw.html"
-        # Check if TailwindCSS template exists using absolute path
-        template_path = os.path.join(current_app.root_path, current_app.template_folder, tw_template)
-        if os.path.exists(template_path):
-            return tw_template
+    year_ago = today - timedelta(days=365)
+    days = []
+    current = year_ago
+    while current <= today:
+        days.append((current.isoformat(), current.weekday()))
+        current += timedelta(days=1)
+    return tuple(days)
 
-    # Fall back to legacy template
-    return f"{base_name}.html"
 
 challenge_bp = Blueprint('challenge', __name__, url_prefix='/challenge')
 
@@ -86,27 +83,20 @@ def challenge_home():
                     trackers[key] = value
 
             # Get today's log entry (for pre-filling form)
-            from datetime import date
-            today_str = date.today().isoformat()
+            today = date.today()
             tracker_log = challenge_data.get('tracker_log', {})
-            todays_entry = tracker_log.get(today_str, {})
+            todays_entry = tracker_log.get(today.isoformat(), {})
 
-            # Generate heatmap data for the past year
-            today = date.today()
-            year_ago = today - timedelta(days=365)
+            # Heatmap for the past year: shared day skeleton plus this user's counts
             activity_log = challenge_data.get('activity_log', {})
-
-            # Build heatmap data structure
-            current = year_ago
-            while current <= today:
-                date_str = current.isoformat()
-                count = activity_log.get(date_str, {}).get('count', 0)
-                heatmap_data.append({
+            heatmap_data = [
+                {
                     'date': date_str,
-                    'count': count,
-                    'weekday': current.weekday()
-                })
-                current += timedelta(days=1)
+                    'count': activity_log[date_str].get('count', 0) if date_str in activity_log else 0,
+                    'weekday': weekday
+                }
+                for date_str, weekday in _heatmap_days(today)
+            ]
 
             # Build solved problems list for display
             # Calendar problems
@@ -245,23 +235,25 @@ def challenge_calendar():
 
     # Build day data for template with actual dates
     # Admins can access all days (not locked)
-    calendar_days = []
-    for day_num in range(1, 29):
-        day_date = start_date + timedelta(days=day_num - 1)
-        day_problems = service.get_day_problems(day_num)
-        calendar_days.append({
+    completed = set(days_completed)
+    day_summaries = service.get_day_summaries()
+    day_dates = [start_date + timedelta(days=offset) for offset in range(len(day_summaries))]
+    calendar_days = [
+        {
             'day': day_num,
             'date': day_date,
             'date_display': day_date.day,  # Just the day number
             'month_short': day_date.strftime('%b'),  # Month abbreviation
             'is_new_month': day_date.day == 1,  # Flag if this is first of month
-            'theme': service.get_day_theme(day_num),
-            'problem_count': len(day_problems),
-            'is_completed': day_num in days_completed,
+            'theme': theme,
+            'problem_count': problem_count,
+            'is_completed': day_num in completed,
             'is_current': day_num == current_day,
             'is_locked': day_num > current_day and not user_is_admin,
             'is_available': day_num <= current_day or user_is_admin
-        })
+        }
+        for day_num, ((theme, problem_count), day_date) in enumerate(zip(day_summaries, day_dates), start=1)
+    ]
 
     return render_template(
         get_themed_template('challenge/calendar'),
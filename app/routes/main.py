@@ -1,103 +1,84 @@
 """
 Main routes blueprint for pages.
 """
-import os
-from flask import Blueprint, render_template, redirect, current_app, request
+from types import MappingProxyType
+from flask import Blueprint, render_template, redirect, current_app
 
 from ..auth.access import get_current_user, has_premium_access, is_admin
 from ..auth.decorators import login_required, premium_required, ai_access_required, guides_required
-from ..models.course import get_sorted_courses
+from ..extensions import cache, conditional_page, page_cache_key
+from ..models.course import SORTED_COURSES
 from ..services.assessment_service import AssessmentService
+from ..utils.templating import get_themed_template
 
 main_bp = Blueprint('main', __name__)
 
 
-def get_themed_template(base_name):
-    """
-    Get the appropriate template based on user's theme preference.
-
-    Args:
-        base_name: Base template name without extension (e.g., 'classroom')
-
-    Returns:
-        Template path based on theme ('dark' = *_tw.html, 'legacy' = *.html)
-    """
-    theme = request.cookies.get('theme', 'dark')
-
-    if theme == 'dark':
-        tw_template = f"{base_name}_tw.html"
-        # Check if TailwindCSS template exists using absolute path
-        # current_app.root_path is the app directory, template_folder is relative to it
-        template_path = os.path.join(current_app.root_path, current_app.template_folder, tw_template)
-        if os.path.exists(template_path):
-            return tw_template
-
-    # Fall back to legacy template
-    return f"{base_name}.html"
-
-
-# Behavioral questions data
-BEHAVIORAL_QUESTIONS = {
-    "General": [
+# Behavioral questions data, frozen so every request shares one read-only copy
+BEHAVIORAL_QUESTIONS = MappingProxyType({
+    "General": (
         "Why do you want to work for [our company]? / Why are you leaving your job?",
         "What are your goals for the future?",
         "What are your strengths / weaknesses?",
         "Do you have experience working with cross-functional teams?",
         "Tell me about a project you're proud of"
-    ],
-    "Customer Obsession": [
+    ),
+    "Customer Obsession": (
         "Tell me about a time you went above and beyond for a customer.",
         "How do you prioritize customer needs in your work?"
-    ],
-    "Ownership": [
+    ),
+    "Ownership": (
         "Describe a time when you took on a task beyond your responsibilities.",
         "Tell me about a time you made a mistake at work. How did you handle it?",
         "Tell me about a time you received feedback from your manager and what did you do?"
-    ],
-    "Invent and Simplify": [
+    ),
+    "Invent and Simplify": (
         "Describe a time you created a simple solution to a complex problem.",
         "Tell me about a process you improved. What was your approach?"
-    ],
-    "Are Right, A Lot": [
+    ),
+    "Are Right, A Lot": (
         "Tell me about a decision you made that was wrong. What did you learn?",
         "Describe a time when you had to make a difficult judgment call."
-    ],
-    "Learn and Be Curious": [
+    ),
+    "Learn and Be Curious": (
         "Tell me about a time you picked up a new skill to solve a problem.",
         "What's the most recent thing you learned on your own?"
-    ],
-    "Think Big": [
+    ),
+    "Think Big": (
         "Tell me about a time you proposed a bold idea. What happened?",
         "Describe a situation where you took a long-term view to solve a problem."
-    ],
-    "Bias for Action": [
+    ),
+    "Bias for Action": (
         "Give me an example of a time when you made a decision quickly.",
         "Tell me about a time you took initiative to start a project."
-    ],
-    "Earn Trust": [
+    ),
+    "Earn Trust": (
         "Tell me about a time you had a conflict with a colleague. How did you handle it?",
         "Describe how you build relationships in a team."
-    ],
-    "Dive Deep": [
+    ),
+    "Dive Deep": (
         "Tell me about a technical problem you had to dig into to understand.",
         "How do you identify root causes when something goes wrong?"
-    ],
-    "Have Backbone; Disagree and Commit": [
+    ),
+    "Have Backbone; Disagree and Commit": (
         "Tell me about a time you strongly disagreed with your manager or team.",
         "Describe a situation where you advocated for a different approach."
-    ],
-    "Deliver Results": [
+    ),
+    "Deliver Results": (
         "Tell me about a time you had to deliver a project under a tight deadline.",
         "Describe how you stay focused and productive."
-    ]
-}
+    )
+})
+
+# Exposed to every template once, instead of being passed into each render
+main_bp.add_app_template_global(BEHAVIORAL_QUESTIONS, 'behavioral_questions')
 
 
 @main_bp.route('/')
+@cache.cached(key_prefix=page_cache_key)
 def index():
     """Classroom homepage - Central hub for all courses."""
-    courses = get_sorted_courses()
-    return render_template(get_themed_template('classroom'), courses=courses)
+    return render_template(get_themed_template('classroom'), courses=SORTED_COURSES)
 
 
 @main_bp.route('/classroom')
@@ -107,12 +88,15 @@ def classroom():
 
 
 @main_bp.route('/landing')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def sales_page():
     """Sales page showing all available premium roadmaps."""
     return render_template(get_themed_template('sales_homepage'))
 
 
 @main_bp.route('/intermediate')
+@cache.cached(key_prefix=page_cache_key)
 def intermediate_view():
     """Intermediate roadmap (Fortune500) - Free for all users."""
     roadmap_service = current_app.roadmap
@@ -121,6 +105,7 @@ def intermediate_view():
 
 @main_bp.route('/advanced')
 @premium_required
+@cache.cached(key_prefix=page_cache_key)
 def advanced_view():
     """Advanced roadmap page - Premium content."""
     roadmap_service = current_app.roadmap
@@ -161,6 +146,7 @@ def intermediate_month_view(month_name):
 
 
 @main_bp.route('/beginner')
+@cache.cached(key_prefix=page_cache_key)
 def beginner_view():
     """View for beginner AtCoder problems."""
     roadmap_service = current_app.roadmap
@@ -188,6 +174,7 @@ def beginner_problem_editor(problem_id):
 
 
 @main_bp.route('/beginner/course')
+@cache.cached(key_prefix=page_cache_key)
 def beginner_course():
     """Course wrapper page for beginner roadmap with video content."""
     course_config = current_app.config.get('COURSE_VIDEOS', {}).get('beginner', {})
@@ -195,6 +182,7 @@ def beginner_course():
 
 
 @main_bp.route('/intermediate/course')
+@cache.cached(key_prefix=page_cache_key)
 def intermediate_course():
     """Course wrapper page for intermediate roadmap with video content."""
     course_config = current_app.config.get('COURSE_VIDEOS', {}).get('intermediate', {})
@@ -202,18 +190,23 @@ def intermediate_course():
 
 
 @main_bp.route('/roadmap')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def software_roadmap():
     """Raymond's Path to Software Engineer at Fortune 1."""
     return render_template('roadmap.html')
 
 
 @main_bp.route('/about')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def about():
     """About Raymond and his journey."""
     return render_template(get_themed_template('about'))
 
 
 @main_bp.route('/python-assessment')
+@cache.cached(key_prefix=page_cache_key)
 def python_assessment():
     """Python programming assessment quiz."""
     quiz_data = AssessmentService.get_python_assessment()
@@ -221,6 +214,7 @@ def python_assessment():
 
 
 @main_bp.route('/java-assessment')
+@cache.cached(key_prefix=page_cache_key)
 def java_assessment():
     """Java programming assessment quiz."""
     quiz_data = AssessmentService.get_java_assessment()
@@ -235,6 +229,7 @@ def guides_redirect():
 
 @main_bp.route('/guides/resume')
 @guides_required
+@cache.cached(key_prefix=page_cache_key)
 def guide_resume():
     """Resume + LinkedIn guide wrapper page."""
     guide_config = current_app.config.get('GUIDE_VIDEOS', {}).get('resume', {})
@@ -243,6 +238,7 @@ def guide_resume():
 
 @main_bp.route('/guides/job-search')
 @guides_required
+@cache.cached(key_prefix=page_cache_key)
 def guide_job_search():
     """Complete Job Search guide wrapper page."""
     guide_config = current_app.config.get('GUIDE_VIDEOS', {}).get('job-search', {})
@@ -251,6 +247,7 @@ def guide_job_search():
 
 @main_bp.route('/guides/leetcode')
 @guides_required
+@cache.cached(key_prefix=page_cache_key)
 def guide_leetcode():
     """LeetCode Solutions guide wrapper page."""
     guide_config = current_app.config.get('GUIDE_VIDEOS', {}).get('leetcode', {})
@@ -259,6 +256,7 @@ def guide_leetcode():
 
 @main_bp.route('/guides/behavioral')
 @ai_access_required
+@cache.cached(key_prefix=page_cache_key)
 def guide_behavioral():
     """Behavioral Interview guide wrapper page - Requires AI access."""
     guide_config = current_app.config.get('GUIDE_VIDEOS', {}).get('behavioral', {})
@@ -267,13 +265,15 @@ def guide_behavioral():
 
 @main_bp.route('/behavioral-guide')
 @ai_access_required
+@cache.cached(key_prefix=page_cache_key)
 def behavioral_guide():
     """Behavioral Interview Guide with AI Helper - AI Access Required."""
-    return render_template(get_themed_template('behavioral_guide'), questions=BEHAVIORAL_QUESTIONS)
+    return render_template(get_themed_template('behavioral_guide'))
 
 
 @main_bp.route('/complete-list')
 @premium_required
+@cache.cached(key_prefix=page_cache_key)
 def complete_list():
     """Complete question list with customizable time sliders."""
     roadmap_service = current_app.roadmap
@@ -282,18 +282,24 @@ def complete_list():
 
 
 @main_bp.route('/privacy')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def privacy_policy():
     """Privacy Policy page."""
     return render_template(get_themed_template('privacy_policy'))
 
 
 @main_bp.route('/terms')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def terms_of_service():
     """Terms of Service page."""
     return render_template(get_themed_template('terms_of_service'))
 
 
 @main_bp.route('/coaching')
+@conditional_page
+@cache.cached(key_prefix=page_cache_key)
 def coaching():
     """Coaching page with Skool community and 1-1 coaching offerings."""
     return render_template(get_themed_template('coaching'))
@@ -1,40 +1,18 @@
 """
 System design routes blueprint.
 """
-import os
-from flask import Blueprint, render_template, current_app, request
+from flask import Blueprint, render_template
 
 from ..auth.decorators import system_design_access_required
-
-
-def get_themed_template(base_name):
-    """
-    Get the appropriate template based on user's theme preference.
-
-    Args:
-        base_name: Base template name without extension (e.g., 'system_design/index')
-
-    Returns:
-        Template path based on theme ('dark' = *_tw.html, 'legacy' = *.html)
-    """
-    theme = request.cookies.get('theme', 'dark')
-
-    if theme == 'dark':
-        tw_template = f"{base_name}_tw.html"
-        # Check if TailwindCSS template exists using absolute path
-        template_path = os.path.join(current_app.root_path, current_app.template_folder, tw_template)
-        if os.path.exists(template_path):
-            return tw_template
-
-    # Fall back to legacy template
-    return f"{base_name}.html"
-
+from ..extensions import cache, page_cache_key
+from ..utils.templating import get_themed_template
 
 system_design_bp = Blueprint('system_design', __name__, url_prefix='/system-design')
 
 
 @system_design_bp.route('/')
 @system_design_access_required
+@cache.cached(key_prefix=page_cache_key)
 def index():
     """System Design Roadmap homepage - System Design Access Required."""
     return render_template(get_themed_template('system_design/index'))
@@ -42,6 +20,7 @@ def index():
 
 @system_design_bp.route('/real-life-problems')
 @system_design_access_required
+@cache.cached(key_prefix=page_cache_key)
 def real_life_problems():
     """System Design Real Life Problems page - System Design Access Required."""
     return render_template(get_themed_template('system_design/real_life_problems'))
@@ -49,6 +28,7 @@ def real_life_problems():
 
 @system_design_bp.route('/trivia')
 @system_design_access_required
+@cache.cached(key_prefix=page_cache_key)
 def trivia():
     """System Design Trivia and Knowledge Checks page - System Design Access Required."""
     return render_template(get_themed_template('system_design/trivia'))
@@ -56,6 +36,7 @@ def trivia():
 
 @system_design_bp.route('/low-level-design')
 @system_design_access_required
+@cache.cached(key_prefix=page_cache_key)
 def low_level_design():
     """System Design Low Level Design page - System Design Access Required."""
     return render_template(get_themed_template('system_design/low_level_design'))
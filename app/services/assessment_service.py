@@ -1,10 +1,11 @@
 """
 Assessment service for loading quiz data.
 """
-import json
 import os
 from typing import Dict, Optional
 
+import orjson
+
 
 class AssessmentService:
     """Service class for loading assessment quiz data."""
@@ -17,10 +18,16 @@ class AssessmentService:
         """Load a JSON file from the data directory."""
         filepath = os.path.join('data', filename)
         if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(filepath, 'rb') as f:
+                return orjson.loads(f.read())
         return {}
 
+    @classmethod
+    def preload(cls):
+        """Load every assessment up front so no request pays the file read and parse."""
+        cls.get_python_assessment()
+        cls.get_java_assessment()
+
     @classmethod
     def get_python_assessment(cls) -> Dict:
         """Get Python assessment quiz data."""
@@ -7,15 +7,22 @@ points calculation, and achievement checking.
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 class ChallengeService:
     """Service class for 28-day challenge operations."""
 
+    # Days shown on the challenge calendar
+    CALENDAR_DAYS = 28
+
     def __init__(self):
         """Initialize the challenge service."""
         self.challenge_data: Dict = {}
+        self._days_by_num: Dict[int, Dict] = {}
+        self._problems_by_day: Dict[Tuple[int, str], Dict] = {}
+        self._problem_by_id: Dict[str, Dict] = {}
+        self._day_summaries: Tuple[Tuple[str, int], ...] = ()
         self._load_challenge_data()
 
     def _load_challenge_data(self) -> None:
@@ -31,10 +38,28 @@ class ChallengeService:
             if os.path.exists(path):
                 with open(path, 'r', encoding='utf-8') as f:
                     self.challenge_data = json.load(f)
-                return
-
-        # Default empty structure if file not found
-        self.challenge_data = {'days': [], 'achievements': {}, 'point_values': {}}
+                break
+        else:
+            # Default empty structure if file not found
+            self.challenge_data = {'days': [], 'achievements': {}, 'point_values': {}}
+
+        # Index days and problems once so lookups don't scan the day list.
+        # setdefault keeps the first match, as the original scans did.
+        self._days_by_num = {}
+        self._problems_by_day = {}
+        self._problem_by_id = {}
+        for d in self.challenge_data.get('days', []):
+            first_for_day = self._days_by_num.setdefault(d['day'], d) is d
+            for p in d.get('problems', []):
+                if first_for_day:
+                    self._problems_by_day.setdefault((d['day'], p.get('id')), p)
+                self._problem_by_id.setdefault(p.get('id'), p)
+
+        # Static per-day calendar info, so page loads don't rescan the days
+        self._day_summaries = tuple(
+            (self.get_day_theme(day), len(self.get_day_problems(day)))
+            for day in range(1, self.CALENDAR_DAYS + 1)
+        )
 
     def get_challenge_days(self) -> List[Dict]:
         """Get all challenge days data."""
@@ -42,33 +67,25 @@ class ChallengeService:
 
     def get_day_problems(self, day: int) -> List[Dict]:
         """Get problems for a specific day."""
-        for d in self.challenge_data.get('days', []):
-            if d['day'] == day:
-                return d.get('problems', [])
-        return []
+        d = self._days_by_num.get(day)
+        return d.get('problems', []) if d is not None else []
 
     def get_day_theme(self, day: int) -> str:
         """Get the theme for a specific day."""
-        for d in self.challenge_data.get('days', []):
-            if d['day'] == day:
-                return d.get('theme', f'Day {day}')
-        return f'Day {day}'
+        d = self._days_by_num.get(day)
+        return d.get('theme', f'Day {day}') if d is not None else f'Day {day}'
+
+    def get_day_summaries(self) -> Tuple[Tuple[str, int], ...]:
+        """Get (theme, problem count) for each calendar day, in day order (precomputed)."""
+        return self._day_summaries
 
     def get_problem(self, day: int, problem_id: str) -> Optional[Dict]:
         """Get a specific problem by day and ID."""
-        problems = self.get_day_problems(day)
-        for p in problems:
-            if p['id'] == problem_id:
-                return p
-        return None
+        return self._problems_by_day.get((day, problem_id))
 
     def get_problem_by_id(self, problem_id: str) -> Optional[Dict]:
         """Find a problem by ID across all days."""
-        for day in self.challenge_data.get('days', []):
-            for problem in day.get('problems', []):
-                if problem.get('id') == problem_id:
-                    return problem
-        return None
+        return self._problem_by_id.get(problem_id)
 
     def calculate_current_day(self, start_date: str) -> int:
         """Calculate which day of the challenge the user is on.
@@ -1,9 +1,22 @@
 """
 Clerk API service for user management operations.
 """
+import logging
 import os
+import threading
+import orjson
 import requests
-from typing import Optional
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from urllib3.util.retry import Retry
+
+# Child of the Flask app logger, so LOG_LEVEL applies and disabled levels cost nothing
+logger = logging.getLogger(__name__)
+
+# Worker threads for fanning out independent Clerk writes
+_update_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='clerk-update')
 
 
 class ClerkService:
@@ -11,10 +24,44 @@ class ClerkService:
 
     BASE_URL = 'https://api.clerk.com/v1'
 
+    # How long an email -> user ID mapping is trusted
+    USER_ID_CACHE_TTL = 300
+
+    # Emails per List Users request; also sent as `limit`, since each email
+    # matches at most one user and Clerk otherwise pages at its default size
+    USER_LOOKUP_BATCH_SIZE = 100
+
+    # Pooled keep-alive connections to api.clerk.com; sized to cover the
+    # update executor plus request threads calling Clerk concurrently
+    HTTP_POOL_SIZE = 32
+
     def __init__(self, secret_key: Optional[str] = None):
         """Initialize the Clerk service with API key."""
         self.secret_key = secret_key
         self._headers = None
+        # Only IDs are cached: metadata must be read fresh before any merge
+        self._user_ids = TTLCache(maxsize=10000, ttl=self.USER_ID_CACHE_TTL)
+        self._user_ids_lock = threading.Lock()
+        self._session = self._build_session()
+
+    @classmethod
+    def _build_session(cls) -> requests.Session:
+        """
+        Create the HTTP session shared by every Clerk call.
+
+        Reusing one session keeps TLS connections to Clerk alive between
+        calls instead of handshaking on each one. Retries cover connection
+        failures on idempotent requests only (urllib3's default methods), so
+        a POST/PATCH that may have reached Clerk is never replayed.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=cls.HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        session.mount('https://', adapter)
+        return session
 
     @property
     def headers(self) -> dict:
@@ -32,18 +79,62 @@ class ClerkService:
 
     def get_user_by_email(self, email: str) -> Optional[dict]:
         """Find Clerk user by email address."""
-        if not self.is_configured():
-            return None
+        return self.get_users_by_emails([email]).get(email)
+
+    def get_user_id_by_email(self, email: str) -> Optional[str]:
+        """Find a Clerk user ID by email, served from a short-lived cache when possible."""
+        with self._user_ids_lock:
+            user_id = self._user_ids.get(email)
+        if user_id:
+            return user_id
+
+        user = self.get_user_by_email(email)
+        return user['id'] if user else None
+
+    def _remember_user_id(self, email: str, user_id: str):
+        """Record an email -> user ID mapping seen in a Clerk response."""
+        with self._user_ids_lock:
+            self._user_ids[email] = user_id
+
+    def _forget_user_id(self, email: str):
+        """Drop a cached email -> user ID mapping."""
+        with self._user_ids_lock:
+            self._user_ids.pop(email, None)
+
+    def get_users_by_emails(self, emails: List[str]) -> Dict[str, dict]:
+        """
+        Find Clerk users for several email addresses in as few requests as possible.
+
+        Clerk's List Users endpoint accepts repeated `email_address` query
+        params, so each request looks up a batch of USER_LOOKUP_BATCH_SIZE
+        emails with an explicit `limit` covering every possible match.
+
+        Args:
+            emails: Email addresses to look up
 
+        Returns:
+            Dict mapping each matched email to its Clerk user (unmatched emails are omitted)
+        """
+        if not self.is_configured() or not emails:
+            return {}
+
+        unique_emails = list(dict.fromkeys(emails))
+        users = {}
+        for start in range(0, len(unique_emails), self.USER_LOOKUP_BATCH_SIZE):
+            users.update(self._get_user_batch(unique_emails[start:start + self.USER_LOOKUP_BATCH_SIZE]))
+        return users
+
+    def _get_user_batch(self, emails: List[str]) -> Dict[str, dict]:
+        """Look up one batch of emails with a single List Users request."""
         try:
-            resp = requests.get(
+            resp = self._session.get(
                 f'{self.BASE_URL}/users',
                 headers=self.headers,
-                params={'email_address': email}
+                params=[('limit', self.USER_LOOKUP_BATCH_SIZE)] + [('email_address', email) for email in emails]
             )
 
             if resp.status_code != 200:
-                return None
+                return {}
 
             response_data = resp.json()
             if isinstance(response_data, dict):
@@ -51,15 +142,19 @@ class ClerkService:
             else:
                 data = response_data
 
+            wanted = set(emails)
+            users = {}
             for user in data:
                 for e in user.get('email_addresses', []):
-                    if e.get('email_address') == email:
-                        return user
-            return None
+                    address = e.get('email_address')
+                    if address in wanted and address not in users:
+                        users[address] = user
+                        self._remember_user_id(address, user['id'])
+            return users
 
         except Exception as e:
-            print(f"Error finding Clerk user {email}: {e}")
-            return None
+            logger.error("Error finding Clerk users %s: %s", ', '.join(emails), e)
+            return {}
 
     def create_user(self, email: str, metadata: dict) -> Optional[dict]:
         """Create new Clerk user with both private and public metadata."""
@@ -76,21 +171,24 @@ class ClerkService:
         }
 
         try:
-            resp = requests.post(
+            resp = self._session.post(
                 f'{self.BASE_URL}/users',
                 headers=self.headers,
-                json=payload
+                data=orjson.dumps(payload)
             )
 
             if resp.status_code != 200:
-                print(f"Failed to create Clerk user {email}: {resp.text}")
+                logger.error("Failed to create Clerk user %s: %s", email, resp.text)
                 return None
 
-            print(f"Created Clerk user {email} from Stripe purchase")
-            return resp.json()
+            logger.info("Created Clerk user %s from Stripe purchase", email)
+            user = resp.json()
+            if user.get('id'):
+                self._remember_user_id(email, user['id'])
+            return user
 
         except Exception as e:
-            print(f"Error creating Clerk user {email}: {e}")
+            logger.error("Error creating Clerk user %s: %s", email, e)
             return None
 
     def update_user_metadata(
@@ -129,65 +227,172 @@ class ClerkService:
                 payload['public_metadata'] = public_metadata
 
         if not payload:
-            print(f"No metadata to update for user {user_id}")
+            logger.debug("No metadata to update for user %s", user_id)
             return None
 
         try:
-            resp = requests.patch(
+            resp = self._session.patch(
                 f'{self.BASE_URL}/users/{user_id}',
                 headers=self.headers,
-                json=payload
+                data=orjson.dumps(payload)
+            )
+
+            if resp.status_code != 200:
+                logger.error("Failed to update Clerk user %s: %s", user_id, resp.text)
+                return None
+
+            logger.info("Updated Clerk user %s metadata", user_id)
+            return resp.json()
+
+        except Exception as e:
+            logger.error("Error updating Clerk user %s: %s", user_id, e)
+            return None
+
+    def merge_user_metadata(
+        self,
+        user_id: str,
+        *,
+        private_metadata: Optional[dict] = None,
+        public_metadata: Optional[dict] = None
+    ) -> Optional[dict]:
+        """
+        Deep-merge changed keys into a Clerk user's metadata.
+
+        Uses Clerk's merge endpoint (PATCH /users/{id}/metadata): nested
+        objects are merged, other values replaced, and keys set to None are
+        removed. Callers send only what changed instead of the full metadata.
+
+        Args:
+            user_id: The Clerk user ID
+            private_metadata: Partial private metadata to merge
+            public_metadata: Partial public metadata to merge
+
+        Returns:
+            Updated user data, or None on failure
+        """
+        if not self.is_configured():
+            return None
+
+        payload = {}
+        if private_metadata is not None:
+            payload['private_metadata'] = private_metadata
+        if public_metadata is not None:
+            payload['public_metadata'] = public_metadata
+
+        if not payload:
+            return None
+
+        try:
+            resp = self._session.patch(
+                f'{self.BASE_URL}/users/{user_id}/metadata',
+                headers=self.headers,
+                data=orjson.dumps(payload)
             )
 
             if resp.status_code != 200:
-                print(f"Failed to update Clerk user {user_id}: {resp.text}")
+                logger.error("Failed to merge Clerk user %s metadata: %s", user_id, resp.text)
                 return None
 
-            print(f"Updated Clerk user {user_id} metadata")
             return resp.json()
 
         except Exception as e:
-            print(f"Error updating Clerk user {user_id}: {e}")
+            logger.error("Error merging Clerk user %s metadata: %s", user_id, e)
             return None
 
     def provision_user(self, email: str, product_metadata: dict) -> bool:
         """Provision or update Clerk user based on product purchase."""
-        # Remove description from metadata before applying
-        user_metadata = {k: v for k, v in product_metadata.items() if k != 'description'}
+        return self.provision_users([(email, product_metadata)])[email]
 
-        # Check if user exists
-        user = self.get_user_by_email(email)
+    def update_metadata_bulk(self, updates: List[Tuple[str, dict]]) -> Dict[str, Optional[dict]]:
+        """
+        Update metadata for several Clerk users concurrently.
 
-        if user:
-            # User exists - merge metadata
-            user_id = user['id']
-            current_metadata = user.get('private_metadata', {})
+        Clerk has no bulk-update endpoint, so this makes the same number of
+        API calls as updating one by one, but overlaps their round-trips.
 
-            # Merge: new metadata takes precedence
-            merged_metadata = current_metadata.copy()
-            for key, value in user_metadata.items():
-                if value or key not in merged_metadata:
-                    merged_metadata[key] = value
+        Args:
+            updates: (user_id, metadata) pairs; metadata is applied as in update_user_metadata
 
-            result = self.update_user_metadata(user_id, merged_metadata)
-            return result is not None
-        else:
-            # Create new user
-            result = self.create_user(email, user_metadata)
-            return result is not None
+        Returns:
+            Dict mapping each user ID to the updated user (None on failure)
+        """
+        if len(updates) <= 1:
+            return {user_id: self.update_user_metadata(user_id, metadata) for user_id, metadata in updates}
+
+        futures = {
+            user_id: _update_executor.submit(self.update_user_metadata, user_id, metadata)
+            for user_id, metadata in updates
+        }
+        return {user_id: future.result() for user_id, future in futures.items()}
+
+    def provision_users(self, items: List[Tuple[str, dict]]) -> Dict[str, bool]:
+        """
+        Provision or update several Clerk users with one batched lookup.
+
+        Items for the same email are merged first, so each user gets a single
+        write; updates to existing users are then sent concurrently.
+
+        Args:
+            items: (email, product_metadata) pairs, e.g. one per Stripe line item
+
+        Returns:
+            Dict mapping each email to whether provisioning succeeded
+        """
+        existing_users = self.get_users_by_emails([email for email, _ in items])
+
+        pending_updates = {}  # user_id -> merged private metadata
+        pending_creates = {}  # email -> metadata for a new user
+        for email, product_metadata in items:
+            # Remove description from metadata before applying
+            user_metadata = {k: v for k, v in product_metadata.items() if k != 'description'}
+            user = existing_users.get(email)
+
+            if user:
+                # User exists - merge onto current (or already-merged) metadata
+                user_id = user['id']
+                current_metadata = pending_updates.get(user_id, user.get('private_metadata', {}))
+                pending_updates[user_id] = self._merge_metadata(current_metadata, user_metadata)
+            else:
+                # New user - merge several items for the same email before one create
+                pending_creates[email] = self._merge_metadata(pending_creates.get(email, {}), user_metadata)
+
+        updated = self.update_metadata_bulk(list(pending_updates.items()))
+
+        results = {}
+        for email, _ in items:
+            if email in results:
+                continue
+            user = existing_users.get(email)
+            if user:
+                results[email] = updated[user['id']] is not None
+            else:
+                results[email] = self.create_user(email, pending_creates[email]) is not None
+
+        return results
+
+    @staticmethod
+    def _merge_metadata(current_metadata: dict, new_metadata: dict) -> dict:
+        """Merge metadata: new values take precedence, but falsy values never revoke existing flags."""
+        return current_metadata | {
+            k: v for k, v in new_metadata.items() if v or k not in current_metadata
+        }
 
     def revoke_user_access(self, email: str) -> bool:
         """Revoke all access for a user."""
-        user = self.get_user_by_email(email)
-        if user:
+        # Revocation overwrites the flags, so only the user ID is needed
+        user_id = self.get_user_id_by_email(email)
+        if user_id:
             revoked_metadata = {
                 'has_premium': False,
                 'has_ai_access': False,
                 'has_system_design_access': False,
                 'has_guides_access': False
             }
-            result = self.update_user_metadata(user['id'], revoked_metadata)
+            result = self.update_user_metadata(user_id, revoked_metadata)
             if result:
-                print(f"Revoked access for {email}")
+                logger.info("Revoked access for %s", email)
+            else:
+                # The cached ID may be stale (e.g. user deleted in Clerk); look it up fresh next time
+                self._forget_user_id(email)
             return result is not None
         return False
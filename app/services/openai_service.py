@@ -1,7 +1,8 @@
 """
 OpenAI service for AI-powered features.
 """
-from typing import Optional
+import threading
+from typing import Iterator, List, Optional
 from openai import OpenAI
 
 
@@ -25,18 +26,40 @@ Provide feedback in this format:
 
 Be constructive but direct. Focus on making the story more compelling and interview-ready."""
 
+    # Behavioral feedback request settings. The format above needs ~300-400
+    # output tokens; a tighter cap bounds worst-case latency and cost.
+    BEHAVIORAL_MODEL = "gpt-4o-mini"
+    BEHAVIORAL_MAX_TOKENS = 500
+    BEHAVIORAL_TEMPERATURE = 0.3
+
+    # Applied once to the shared client rather than per call
+    TIMEOUT = 30
+    MAX_RETRIES = 2
+
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the OpenAI service."""
         self.api_key = api_key
         self._client = None
+        self._client_lock = threading.Lock()
 
     @property
     def client(self) -> OpenAI:
-        """Get OpenAI client, creating if necessary."""
+        """
+        Get the shared OpenAI client, creating it on first use.
+
+        One client serves every request so its pooled HTTP connections (and
+        TLS sessions) to api.openai.com are reused.
+        """
         if self._client is None:
             if not self.api_key:
                 raise ValueError("OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
-            self._client = OpenAI(api_key=self.api_key)
+            with self._client_lock:
+                if self._client is None:
+                    self._client = OpenAI(
+                        api_key=self.api_key,
+                        timeout=self.TIMEOUT,
+                        max_retries=self.MAX_RETRIES
+                    )
         return self._client
 
     def is_configured(self) -> bool:
@@ -45,20 +68,52 @@ Be constructive but direct. Focus on making the story more compelling and interv
 
     def get_behavioral_feedback(self, question: str, story: str) -> str:
         """Get AI feedback on a behavioral interview story."""
+        response = self.client.chat.completions.create(
+            model=self.BEHAVIORAL_MODEL,
+            messages=self._behavioral_messages(question, story),
+            max_tokens=self.BEHAVIORAL_MAX_TOKENS,
+            temperature=self.BEHAVIORAL_TEMPERATURE
+        )
+
+        return response.choices[0].message.content
+
+    def stream_behavioral_feedback(self, question: str, story: str) -> Iterator[str]:
+        """
+        Stream AI feedback on a behavioral interview story.
+
+        Yields text fragments as the model produces them, so callers can
+        show the first words within a second instead of after the full
+        completion.
+        """
+        stream = self.client.chat.completions.create(
+            model=self.BEHAVIORAL_MODEL,
+            messages=self._behavioral_messages(question, story),
+            max_tokens=self.BEHAVIORAL_MAX_TOKENS,
+            temperature=self.BEHAVIORAL_TEMPERATURE,
+            stream=True
+        )
+
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def _behavioral_messages(self, question: str, story: str) -> List[dict]:
+        """
+        Build the chat messages for behavioral story feedback.
+
+        The system prompt always comes first and never varies, so every
+        request shares an identical prefix for OpenAI's prompt caching.
+        """
         user_prompt = f"""Question: {question}
 
 Candidate's Story: {story}
 
 Please evaluate this behavioral story and provide detailed feedback."""
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": self.BEHAVIORAL_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-
-        return response.choices[0].message.content
+        return [
+            {"role": "system", "content": self.BEHAVIORAL_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
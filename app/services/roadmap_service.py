@@ -2,12 +2,41 @@
 Roadmap service for loading and processing roadmap data.
 """
 import json
+import logging
 import os
-from typing import Dict, List, Any
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from pdf_analyzer import LeetCodeRoadmapAnalyzer
+from ..models.problem import Problem
 from ..utils.problem_utils import estimate_difficulty_and_topics
 
+# Child of the Flask app logger, so LOG_LEVEL applies
+logger = logging.getLogger(__name__)
+
+# Popular LeetCode problems appended to the complete list when not already
+# covered by a roadmap; built once at import and never mutated.
+_ADDITIONAL_PROBLEMS = (
+    {'title': 'Two Sum', 'url': 'https://leetcode.com/problems/two-sum/', 'difficulty': 'Easy', 'time': 15, 'topics': ('Array', 'Hash Table')},
+    {'title': 'Add Two Numbers', 'url': 'https://leetcode.com/problems/add-two-numbers/', 'difficulty': 'Medium', 'time': 25, 'topics': ('Linked List', 'Math')},
+    {'title': 'Longest Substring Without Repeating Characters', 'url': 'https://leetcode.com/problems/longest-substring-without-repeating-characters/', 'difficulty': 'Medium', 'time': 30, 'topics': ('String', 'Sliding Window')},
+    {'title': 'Median of Two Sorted Arrays', 'url': 'https://leetcode.com/problems/median-of-two-sorted-arrays/', 'difficulty': 'Hard', 'time': 45, 'topics': ('Array', 'Binary Search')},
+    {'title': 'Valid Parentheses', 'url': 'https://leetcode.com/problems/valid-parentheses/', 'difficulty': 'Easy', 'time': 20, 'topics': ('String', 'Stack')},
+    {'title': 'Merge Two Sorted Lists', 'url': 'https://leetcode.com/problems/merge-two-sorted-lists/', 'difficulty': 'Easy', 'time': 20, 'topics': ('Linked List', 'Recursion')},
+    {'title': 'Remove Duplicates from Sorted Array', 'url': 'https://leetcode.com/problems/remove-duplicates-from-sorted-array/', 'difficulty': 'Easy', 'time': 15, 'topics': ('Array', 'Two Pointers')},
+    {'title': 'Best Time to Buy and Sell Stock', 'url': 'https://leetcode.com/problems/best-time-to-buy-and-sell-stock/', 'difficulty': 'Easy', 'time': 20, 'topics': ('Array', 'Dynamic Programming')},
+    {'title': 'Valid Palindrome', 'url': 'https://leetcode.com/problems/valid-palindrome/', 'difficulty': 'Easy', 'time': 15, 'topics': ('String', 'Two Pointers')},
+    {'title': 'Invert Binary Tree', 'url': 'https://leetcode.com/problems/invert-binary-tree/', 'difficulty': 'Easy', 'time': 15, 'topics': ('Binary Tree', 'DFS')},
+    {'title': 'Maximum Subarray', 'url': 'https://leetcode.com/problems/maximum-subarray/', 'difficulty': 'Medium', 'time': 20, 'topics': ('Array', 'Dynamic Programming')},
+    {'title': 'Climbing Stairs', 'url': 'https://leetcode.com/problems/climbing-stairs/', 'difficulty': 'Easy', 'time': 20, 'topics': ('Math', 'Dynamic Programming')},
+    {'title': 'Binary Search', 'url': 'https://leetcode.com/problems/binary-search/', 'difficulty': 'Easy', 'time': 15, 'topics': ('Array', 'Binary Search')},
+    {'title': 'Flood Fill', 'url': 'https://leetcode.com/problems/flood-fill/', 'difficulty': 'Easy', 'time': 20, 'topics': ('Array', 'DFS', 'BFS')},
+    {'title': 'Number of Islands', 'url': 'https://leetcode.com/problems/number-of-islands/', 'difficulty': 'Medium', 'time': 25, 'topics': ('Array', 'DFS', 'BFS')},
+)
+
+
+# AtCoder beginner problems are all short implementation tasks
+_ATCODER_ESTIMATE = ('Easy', ('Algorithm', 'Implementation'), 15)
+
 
 class RoadmapService:
     """Service class for roadmap data operations."""
@@ -21,6 +50,8 @@ class RoadmapService:
         self.month_order = month_order
         self.month_mapping = month_mapping
         self.intermediate_month_order = intermediate_month_order
+        self._ordered_roadmap_data: Dict = {}
+        self._ordered_intermediate_roadmap_data: Dict = {}
         self._load_all_data()
 
     def _load_all_data(self):
@@ -28,22 +59,46 @@ class RoadmapService:
         self._load_roadmap_data()
         self._load_intermediate_roadmap_data()
         self._load_atcoder_problems()
+        self._build_ordered_data()
+
+    def _build_ordered_data(self):
+        """Precompute the ordered month views so requests don't rebuild them."""
+        ordered_data = {}
+        for original_month in self.month_order:
+            if original_month in self.roadmap_data:
+                display_month = self.month_mapping.get(original_month, original_month)
+                ordered_data[display_month] = self._process_month_data(self.roadmap_data[original_month])
+        self._ordered_roadmap_data = ordered_data
+
+        ordered_data = {}
+        for month in self.intermediate_month_order:
+            if month in self.intermediate_roadmap_data:
+                ordered_data[month] = self._process_month_data(self.intermediate_roadmap_data[month])
+        self._ordered_intermediate_roadmap_data = ordered_data
 
     def _load_roadmap_data(self):
         """Load roadmap data from JSON file."""
         if os.path.exists('roadmap_data.json'):
             with open('roadmap_data.json', 'r', encoding='utf-8') as f:
-                self.roadmap_data = json.load(f)
+                self.roadmap_data = self._to_problem_models(json.load(f))
         else:
-            print("No roadmap data found. Run pdf_analyzer.py first.")
+            logger.warning("No roadmap data found. Run pdf_analyzer.py first.")
 
     def _load_intermediate_roadmap_data(self):
         """Load intermediate roadmap data from JSON file."""
         if os.path.exists('intermediate_roadmap_data_v2.json'):
             with open('intermediate_roadmap_data_v2.json', 'r', encoding='utf-8') as f:
-                self.intermediate_roadmap_data = json.load(f)
+                self.intermediate_roadmap_data = self._to_problem_models(json.load(f))
         else:
-            print("No intermediate roadmap data found. Run pdf analyzer for intermediate PDFs first.")
+            logger.warning("No intermediate roadmap data found. Run pdf analyzer for intermediate PDFs first.")
+
+    @staticmethod
+    def _to_problem_models(data: Dict) -> Dict:
+        """Convert each day's problem dicts into Problem models."""
+        for month_data in data.values():
+            for day in month_data:
+                day['problems'] = [Problem.from_dict(p) for p in day.get('problems', [])]
+        return data
 
     def _load_atcoder_problems(self):
         """Load AtCoder beginner problems from JSON file."""
@@ -51,7 +106,7 @@ class RoadmapService:
             with open('atcoder_beginner_problems.json', 'r', encoding='utf-8') as f:
                 self.atcoder_problems = json.load(f)
         else:
-            print("No AtCoder problems found. Run scripts/atcoder_scraper.py first.")
+            logger.warning("No AtCoder problems found. Run scripts/atcoder_scraper.py first.")
 
     def _process_month_data(self, month_data: List[Dict]) -> List[Dict]:
         """Process month data to separate bonus problems."""
@@ -84,22 +139,11 @@ class RoadmapService:
 
     def get_ordered_roadmap_data(self) -> Dict:
         """Get roadmap data ordered properly and with renamed months."""
-        ordered_data = {}
-        for original_month in self.month_order:
-            if original_month in self.roadmap_data:
-                display_month = self.month_mapping.get(original_month, original_month)
-                month_data = self.roadmap_data[original_month].copy()
-                ordered_data[display_month] = self._process_month_data(month_data)
-        return ordered_data
+        return self._ordered_roadmap_data
 
     def get_ordered_intermediate_roadmap_data(self) -> Dict:
         """Get intermediate roadmap data ordered properly."""
-        ordered_data = {}
-        for month in self.intermediate_month_order:
-            if month in self.intermediate_roadmap_data:
-                month_data = self.intermediate_roadmap_data[month].copy()
-                ordered_data[month] = self._process_month_data(month_data)
-        return ordered_data
+        return self._ordered_intermediate_roadmap_data
 
     def get_original_month_name(self, display_month: str) -> str:
         """Get original month name from display name."""
@@ -118,109 +162,73 @@ class RoadmapService:
 
     def get_all_problems(self) -> List[Dict]:
         """Get all problems from all sources for the complete list."""
-        all_questions = []
+        rows = []
         seen_urls = set()
 
-        # Add questions from regular roadmap
-        for month_name, month_data in self.roadmap_data.items():
-            for day_data in month_data:
-                for problem in day_data.get('problems', []):
-                    url = problem.get('url', '')
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        problem_name = problem.get('name', 'Unknown Problem')
-                        difficulty, topics, time = estimate_difficulty_and_topics(problem_name)
-
-                        all_questions.append({
-                            'id': len(all_questions) + 1,
-                            'title': problem_name,
-                            'url': url,
-                            'difficulty': difficulty,
-                            'time': time,
-                            'topics': topics,
-                            'source': f'advanced-{month_name}'
-                        })
-
-        # Add questions from intermediate roadmap
-        for month_name, month_data in self.intermediate_roadmap_data.items():
-            for day_data in month_data:
-                for problem in day_data.get('problems', []):
-                    url = problem.get('url', '')
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        problem_name = problem.get('name', 'Unknown Problem')
-                        difficulty, topics, time = estimate_difficulty_and_topics(problem_name)
-
-                        all_questions.append({
-                            'id': len(all_questions) + 1,
-                            'title': problem_name,
-                            'url': url,
-                            'difficulty': difficulty,
-                            'time': time,
-                            'topics': topics,
-                            'source': f'intermediate-{month_name}'
-                        })
-
-        # Add questions from AtCoder beginner problems
-        for problem in self.atcoder_problems.get('problems', []):
-            url = problem.get('url', '')
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                problem_name = problem.get('title', 'Unknown Problem')
-
-                all_questions.append({
-                    'id': len(all_questions) + 1,
-                    'title': problem_name,
-                    'url': url,
-                    'difficulty': 'Easy',
-                    'time': 15,
-                    'topics': ['Algorithm', 'Implementation'],
-                    'source': 'atcoder-beginner'
-                })
+        for url, problem_name, source, estimate in self._iter_problem_sources():
+            if not url or url in seen_urls:
+                continue
+            seen_urls.add(url)
+            difficulty, topics, time = estimate or estimate_difficulty_and_topics(problem_name)
+            rows.append((url, problem_name, difficulty, time, topics, source))
+
+        all_questions = [
+            {
+                'id': problem_id,
+                'title': problem_name,
+                'url': url,
+                'difficulty': difficulty,
+                'time': time,
+                'topics': list(topics),
+                'source': source
+            }
+            for problem_id, (url, problem_name, difficulty, time, topics, source)
+            in enumerate(rows, start=1)
+        ]
 
         # Add additional popular LeetCode problems
         all_questions.extend(self._get_additional_problems(seen_urls, len(all_questions)))
 
         return all_questions
 
+    def _iter_problem_sources(self) -> Iterator[Tuple[str, str, str, Optional[Tuple]]]:
+        """
+        Yield (url, name, source, estimate) for every roadmap and AtCoder problem.
+
+        `estimate` is a fixed (difficulty, topics, time) triple, or None when it
+        should be derived from the problem name. Sources are yielded in
+        priority order so the first occurrence of a URL wins.
+        """
+        for prefix, roadmap in (('advanced', self.roadmap_data),
+                                ('intermediate', self.intermediate_roadmap_data)):
+            for month_name, month_data in roadmap.items():
+                source = f'{prefix}-{month_name}'
+                for day_data in month_data:
+                    for problem in day_data.get('problems', []):
+                        yield problem.url, problem.name, source, None
+
+        for problem in self.atcoder_problems.get('problems', []):
+            yield (problem.get('url', ''), problem.get('title', 'Unknown Problem'),
+                   'atcoder-beginner', _ATCODER_ESTIMATE)
+
     def _get_additional_problems(self, seen_urls: set, start_id: int) -> List[Dict]:
         """Get additional popular LeetCode problems."""
-        additional_problems = [
-            {'title': 'Two Sum', 'url': 'https://leetcode.com/problems/two-sum/', 'difficulty': 'Easy', 'time': 15, 'topics': ['Array', 'Hash Table']},
-            {'title': 'Add Two Numbers', 'url': 'https://leetcode.com/problems/add-two-numbers/', 'difficulty': 'Medium', 'time': 25, 'topics': ['Linked List', 'Math']},
-            {'title': 'Longest Substring Without Repeating Characters', 'url': 'https://leetcode.com/problems/longest-substring-without-repeating-characters/', 'difficulty': 'Medium', 'time': 30, 'topics': ['String', 'Sliding Window']},
-            {'title': 'Median of Two Sorted Arrays', 'url': 'https://leetcode.com/problems/median-of-two-sorted-arrays/', 'difficulty': 'Hard', 'time': 45, 'topics': ['Array', 'Binary Search']},
-            {'title': 'Valid Parentheses', 'url': 'https://leetcode.com/problems/valid-parentheses/', 'difficulty': 'Easy', 'time': 20, 'topics': ['String', 'Stack']},
-            {'title': 'Merge Two Sorted Lists', 'url': 'https://leetcode.com/problems/merge-two-sorted-lists/', 'difficulty': 'Easy', 'time': 20, 'topics': ['Linked List', 'Recursion']},
-            {'title': 'Remove Duplicates from Sorted Array', 'url': 'https://leetcode.com/problems/remove-duplicates-from-sorted-array/', 'difficulty': 'Easy', 'time': 15, 'topics': ['Array', 'Two Pointers']},
-            {'title': 'Best Time to Buy and Sell Stock', 'url': 'https://leetcode.com/problems/best-time-to-buy-and-sell-stock/', 'difficulty': 'Easy', 'time': 20, 'topics': ['Array', 'Dynamic Programming']},
-            {'title': 'Valid Palindrome', 'url': 'https://leetcode.com/problems/valid-palindrome/', 'difficulty': 'Easy', 'time': 15, 'topics': ['String', 'Two Pointers']},
-            {'title': 'Invert Binary Tree', 'url': 'https://leetcode.com/problems/invert-binary-tree/', 'difficulty': 'Easy', 'time': 15, 'topics': ['Binary Tree', 'DFS']},
-            {'title': 'Maximum Subarray', 'url': 'https://leetcode.com/problems/maximum-subarray/', 'difficulty': 'Medium', 'time': 20, 'topics': ['Array', 'Dynamic Programming']},
-            {'title': 'Climbing Stairs', 'url': 'https://leetcode.com/problems/climbing-stairs/', 'difficulty': 'Easy', 'time': 20, 'topics': ['Math', 'Dynamic Programming']},
-            {'title': 'Binary Search', 'url': 'https://leetcode.com/problems/binary-search/', 'difficulty': 'Easy', 'time': 15, 'topics': ['Array', 'Binary Search']},
-            {'title': 'Flood Fill', 'url': 'https://leetcode.com/problems/flood-fill/', 'difficulty': 'Easy', 'time': 20, 'topics': ['Array', 'DFS', 'BFS']},
-            {'title': 'Number of Islands', 'url': 'https://leetcode.com/problems/number-of-islands/', 'difficulty': 'Medium', 'time': 25, 'topics': ['Array', 'DFS', 'BFS']},
+        fresh = [problem for problem in _ADDITIONAL_PROBLEMS if problem['url'] not in seen_urls]
+        seen_urls.update(problem['url'] for problem in fresh)
+
+        return [
+            {
+                'id': problem_id,
+                'title': problem['title'],
+                'url': problem['url'],
+                'difficulty': problem['difficulty'],
+                'time': problem['time'],
+                'topics': list(problem['topics']),
+                'source': 'popular'
+            }
+            for problem_id, problem in enumerate(fresh, start=start_id + 1)
         ]
 
-        result = []
-        current_id = start_id
-        for problem in additional_problems:
-            if problem['url'] not in seen_urls:
-                seen_urls.add(problem['url'])
-                current_id += 1
-                result.append({
-                    'id': current_id,
-                    'title': problem['title'],
-                    'url': problem['url'],
-                    'difficulty': problem['difficulty'],
-                    'time': problem['time'],
-                    'topics': problem['topics'],
-                    'source': 'popular'
-                })
-
-        return result
-
     def refresh_data(self):
         """Refresh data by re-analyzing PDFs. Refuses to overwrite with empty data."""
         analyzer = LeetCodeRoadmapAnalyzer()
@@ -1,28 +1,162 @@
 """
 Stripe service for payment processing and webhook handling.
 """
+import hashlib
+import hmac
+import json
+import logging
+import time
+import threading
 import stripe
-from typing import Optional
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, List, Mapping, Optional, Tuple
+
+# Child of the Flask app logger, so LOG_LEVEL applies and disabled levels cost nothing
+logger = logging.getLogger(__name__)
+
+# Access granted for products missing from STRIPE_PRODUCT_METADATA
+_DEFAULT_PRODUCT_METADATA = MappingProxyType({
+    'has_premium': True,
+    'has_ai_access': False,
+    'has_system_design_access': False,
+    'description': 'Default Premium (Unknown Product)'
+})
+
+# Worker threads for Stripe lookups that can overlap within one webhook
+_lookup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='stripe-lookup')
+
+
+def _retrieve_customer_email(customer_id: str) -> Optional[str]:
+    """Fetch a Stripe customer's email."""
+    return stripe.Customer.retrieve(customer_id).email
+
+
+def _retrieve_session_line_items(session_id: str) -> list:
+    """Fetch a checkout session's line items from Stripe."""
+    logger.debug("Fetching session %s with line items", session_id)
+    session = stripe.checkout.Session.retrieve(session_id, expand=['line_items'])
+    line_items = session.get('line_items', {}).get('data', [])
+    logger.debug("Retrieved %d line items", len(line_items))
+    return line_items
+
+
+def _signature_matches(payload: bytes, header: Optional[str], signers: Tuple[hmac.HMAC, ...],
+                       tolerance: int) -> bool:
+    """
+    Check a `Stripe-Signature` header against the raw payload.
+
+    Mirrors stripe.WebhookSignature.verify_header (timestamp tolerance plus
+    constant-time HMAC-SHA256 comparison of every v1 signature) but returns
+    a bool, so forged or stale requests are rejected before any JSON parsing.
+    Several secrets may be configured to cover signing-secret rotation; each
+    is passed as an HMAC already keyed with it, which is copied per request.
+    """
+    if not header:
+        return False
+
+    timestamp = None
+    signatures = []
+    for item in header.split(','):
+        key, _, value = item.partition('=')
+        if key == 't':
+            timestamp = value
+        elif key == 'v1':
+            # Compared as bytes: compare_digest raises TypeError on non-ASCII str
+            signatures.append(value.encode('utf-8', 'surrogateescape'))
+
+    if not timestamp or not signatures:
+        return False
+    try:
+        # Only too-old timestamps fail, as in the SDK, so a sender clock running ahead is tolerated
+        if int(timestamp) < time.time() - tolerance:
+            return False
+    except ValueError:
+        return False
+
+    # Feed the prefix and payload separately rather than concatenating a copy
+    prefix = timestamp.encode() + b'.'
+    for signer in signers:
+        mac = signer.copy()
+        mac.update(prefix)
+        mac.update(payload)
+        expected = mac.hexdigest().encode()
+        if any(hmac.compare_digest(expected, signature) for signature in signatures):
+            return True
+    return False
+
+
+def _skip_customer_lookup(customer_id: str) -> Optional[str]:
+    """Stand-in for customer lookups when Stripe is not configured."""
+    return None
+
+
+def _skip_line_items_lookup(session_id: str) -> list:
+    """Stand-in for session lookups when Stripe is not configured."""
+    return []
 
 
 class StripeService:
     """Service class for Stripe operations."""
 
-    SUPPORTED_EVENTS = [
+    # Maximum age (seconds) of a signed webhook, matching stripe-python's default
+    WEBHOOK_TOLERANCE = 300
+
+    SUPPORTED_EVENTS = frozenset({
         'checkout.session.completed',
         'invoice.payment_succeeded',
         'customer.subscription.updated',
         'customer.subscription.deleted'
-    ]
+    })
 
-    def __init__(self, secret_key: Optional[str], webhook_secret: Optional[str], product_config: dict):
-        """Initialize the Stripe service."""
+    # How long a customer ID -> email mapping is cached
+    CUSTOMER_EMAIL_CACHE_TIMEOUT = 24 * 60 * 60
+
+    # Stripe retries failed deliveries for up to 3 days
+    EVENT_DEDUP_TIMEOUT = 3 * 24 * 60 * 60
+
+    def __init__(self, secret_key: Optional[str], webhook_secret: Optional[str], product_config: Mapping,
+                 customer_cache: Optional[Any] = None, event_store: Optional[Any] = None):
+        """
+        Initialize the Stripe service.
+
+        Args:
+            secret_key: Stripe API secret key
+            webhook_secret: Webhook signing secret(s), comma-separated during rotation
+            product_config: Product ID -> access metadata mapping
+            customer_cache: Optional cachelib backend (e.g. Redis) shared across
+                workers for customer email lookups
+            event_store: Optional Redis client holding webhook event claims; kept
+                apart from the page cache so page invalidation never drops them
+        """
         self.secret_key = secret_key
         self.webhook_secret = webhook_secret
         self.product_config = product_config
+        self._customer_cache = customer_cache
+        self._event_store = event_store
+        # Per-process fallback when no Redis is configured (best-effort dedup only)
+        self._claimed_events = TTLCache(maxsize=10000, ttl=self.EVENT_DEDUP_TIMEOUT)
+        self._claimed_events_lock = threading.Lock()
+        # Per-process customer email cache when no shared cache is configured
+        self._customer_emails = TTLCache(maxsize=4096, ttl=self.CUSTOMER_EMAIL_CACHE_TIMEOUT)
+        self._customer_emails_lock = threading.Lock()
 
+        # Comma-separated secrets let old and new signing secrets overlap during rotation;
+        # the HMAC key schedule is computed once here instead of on every webhook
+        self._webhook_signers = tuple(
+            hmac.new(secret.strip().encode(), digestmod=hashlib.sha256)
+            for secret in (webhook_secret or '').split(',') if secret.strip()
+        )
+
+        # Bind the Stripe API lookups once so call sites don't re-check configuration
         if secret_key:
             stripe.api_key = secret_key
+            self._retrieve_customer_email = _retrieve_customer_email
+            self._retrieve_session_line_items = _retrieve_session_line_items
+        else:
+            self._retrieve_customer_email = _skip_customer_lookup
+            self._retrieve_session_line_items = _skip_line_items_lookup
 
     def is_configured(self) -> bool:
         """Check if Stripe is properly configured."""
@@ -33,22 +167,57 @@ class StripeService:
         return bool(self.webhook_secret)
 
     def verify_webhook(self, payload: bytes, signature: str) -> Optional[dict]:
-        """Verify and construct webhook event."""
+        """
+        Verify and construct webhook event.
+
+        The signature is checked against the raw bytes first; the payload is
+        only parsed into a stripe.Event once it is known to be authentic.
+        """
         if not self.is_webhook_configured():
             return None
 
+        if not _signature_matches(payload, signature, self._webhook_signers, self.WEBHOOK_TOLERANCE):
+            logger.warning("Invalid webhook signature")
+            return None
+
         try:
-            event = stripe.Webhook.construct_event(
-                payload, signature, self.webhook_secret
-            )
-            return event
+            return stripe.Event.construct_from(json.loads(payload), stripe.api_key)
         except ValueError as e:
-            print(f"Invalid webhook payload: {e}")
-            return None
-        except stripe.error.SignatureVerificationError as e:
-            print(f"Invalid webhook signature: {e}")
+            logger.warning("Invalid webhook payload: %s", e)
             return None
 
+    def claim_event(self, event_id: str) -> bool:
+        """
+        Claim a webhook event ID for processing.
+
+        Stripe delivers at-least-once, so only the first claim of an ID
+        succeeds. With Redis this is one SET NX EX shared by every worker;
+        without it, claims are held per process, so a redelivery that lands on
+        another worker (or after a restart) is processed again.
+
+        Returns:
+            True if this caller should process the event, False if it was already claimed
+        """
+        key = f'stripe-event:{event_id}'
+        if self._event_store is not None:
+            return bool(self._event_store.set(key, 1, nx=True, ex=self.EVENT_DEDUP_TIMEOUT))
+
+        with self._claimed_events_lock:
+            if key in self._claimed_events:
+                return False
+            self._claimed_events[key] = True
+            return True
+
+    def release_event(self, event_id: str) -> None:
+        """Drop a claim taken by claim_event, so Stripe's redelivery of a failed event is processed."""
+        key = f'stripe-event:{event_id}'
+        if self._event_store is not None:
+            self._event_store.delete(key)
+            return
+
+        with self._claimed_events_lock:
+            self._claimed_events.pop(key, None)
+
     def is_supported_event(self, event_type: str) -> bool:
         """Check if event type is supported."""
         return event_type in self.SUPPORTED_EVENTS
@@ -69,75 +238,114 @@ class StripeService:
 
         # Fetch customer object
         customer_id = data.get('customer')
-        if customer_id and self.is_configured():
+        if customer_id:
             try:
-                customer = stripe.Customer.retrieve(customer_id)
-                return customer.email
+                return self._lookup_customer_email(customer_id)
             except Exception as e:
-                print(f"Error fetching customer {customer_id}: {e}")
+                logger.error("Error fetching customer %s: %s", customer_id, e)
                 return None
 
         return None
 
-    def extract_product_id(self, event: dict) -> Optional[str]:
-        """Extract product ID from Stripe event."""
+    def _lookup_customer_email(self, customer_id: str) -> Optional[str]:
+        """Resolve a customer's email via the shared or per-process cache, then Stripe."""
+        if self._customer_cache is None:
+            with self._customer_emails_lock:
+                email = self._customer_emails.get(customer_id)
+            if email is None:
+                email = self._retrieve_customer_email(customer_id)
+                # Customers without an email aren't cached, so one added later is picked up
+                if email:
+                    with self._customer_emails_lock:
+                        self._customer_emails[customer_id] = email
+            return email
+
+        key = f'stripe:customer_email:{customer_id}'
+        email = self._customer_cache.get(key)
+        if email is None:
+            email = self._retrieve_customer_email(customer_id)
+            if email:
+                self._customer_cache.set(key, email, timeout=self.CUSTOMER_EMAIL_CACHE_TIMEOUT)
+        return email
+
+    def extract_product_ids(self, event: dict) -> List[str]:
+        """Extract the product ID of every line item in a Stripe event (in order, without repeats)."""
         event_type = event.get('type', '')
         data = event.get('data', {}).get('object', {})
+        items = []
 
         # For checkout.session.completed
         if event_type == 'checkout.session.completed':
-            line_items = data.get('line_items', {}).get('data', [])
+            items = data.get('line_items', {}).get('data', [])
 
             # If line_items not in event, fetch the session with expanded line_items
-            if not line_items and self.is_configured():
+            if not items:
                 session_id = data.get('id')
                 if session_id:
                     try:
-                        print(f"Fetching session {session_id} with line items...")
-                        session = stripe.checkout.Session.retrieve(
-                            session_id,
-                            expand=['line_items']
-                        )
-                        line_items = session.get('line_items', {}).get('data', [])
-                        print(f"Retrieved {len(line_items)} line items")
+                        items = self._retrieve_session_line_items(session_id)
                     except Exception as e:
-                        print(f"Error fetching session: {e}")
-
-            # Extract product from line items
-            if line_items:
-                price = line_items[0].get('price', {})
-                product_id = price.get('product')
-                print(f"Found product ID from line items: {product_id}")
-                return product_id
+                        logger.error("Error fetching session %s: %s", session_id, e)
 
         # For subscription/invoice events
-        if 'subscription' in event_type or event_type == 'invoice.payment_succeeded':
+        elif 'subscription' in event_type or event_type == 'invoice.payment_succeeded':
             if 'items' in data:
                 items = data['items'].get('data', [])
-                if items:
-                    price = items[0].get('price', {})
-                    return price.get('product')
+            if not items and 'lines' in data:
+                items = data['lines'].get('data', [])
 
-            if 'lines' in data:
-                lines = data['lines'].get('data', [])
-                if lines:
-                    price = lines[0].get('price', {})
-                    return price.get('product')
+        product_ids = [item.get('price', {}).get('product') for item in items]
+        product_ids = list(dict.fromkeys(pid for pid in product_ids if pid))
+        logger.debug("Found product IDs from line items: %s", product_ids)
+        return product_ids
 
-        return None
+    def extract_product_id(self, event: dict) -> Optional[str]:
+        """Extract the first line item's product ID from a Stripe event."""
+        product_ids = self.extract_product_ids(event)
+        return product_ids[0] if product_ids else None
+
+    def extract_customer_and_products(self, event: dict) -> Tuple[Optional[str], List[str]]:
+        """
+        Extract customer email and every product ID from a Stripe event.
+
+        Each lookup may need its own Stripe round-trip (customer retrieve and
+        checkout session retrieve). Only when both are needed does the email
+        lookup run on a worker thread alongside the product lookup; otherwise
+        at most one fetch happens and both run inline.
+
+        Returns:
+            Tuple of (customer_email, product_ids)
+        """
+        event_type = event.get('type', '')
+        data = event.get('data', {}).get('object', {})
+        if not (self._needs_customer_fetch(data) and self._needs_line_items_fetch(event_type, data)):
+            return self.extract_customer_email(event), self.extract_product_ids(event)
+
+        email_future = _lookup_executor.submit(self.extract_customer_email, event)
+        product_ids = self.extract_product_ids(event)
+        return email_future.result(), product_ids
+
+    @staticmethod
+    def _needs_customer_fetch(data: dict) -> bool:
+        """Whether the email has to come from a Customer.retrieve (see extract_customer_email)."""
+        if data.get('customer_email') or (data.get('customer_details') or {}).get('email'):
+            return False
+        return bool(data.get('customer'))
+
+    @staticmethod
+    def _needs_line_items_fetch(event_type: str, data: dict) -> bool:
+        """Whether the line items have to come from a session retrieve (see extract_product_ids)."""
+        if event_type != 'checkout.session.completed':
+            return False
+        return not data.get('line_items', {}).get('data') and bool(data.get('id'))
 
-    def get_product_metadata(self, product_id: str) -> dict:
-        """Get product metadata from configuration."""
+    def get_product_metadata(self, product_id: str) -> Mapping:
+        """Get product metadata from configuration (read-only - copy before modifying)."""
         metadata = self.product_config.get(product_id)
 
         if not metadata:
-            print(f"Unknown product ID: {product_id}, using default premium access")
-            return {
-                'has_premium': True,
-                'has_ai_access': False,
-                'has_system_design_access': False,
-                'description': 'Default Premium (Unknown Product)'
-            }
+            logger.warning("Unknown product ID %s, using default premium access", product_id)
+            return _DEFAULT_PRODUCT_METADATA
 
         return metadata
 
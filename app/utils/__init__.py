@@ -1,6 +1,8 @@
 """
 Utilities package for the LeetCode Roadmap Generator.
 """
+from .date_utils import today_iso
 from .problem_utils import estimate_difficulty_and_topics, generate_leetcode_url
+from .templating import get_theme, get_themed_template
 
-__all__ = ['estimate_difficulty_and_topics', 'generate_leetcode_url']
+__all__ = ['estimate_difficulty_and_topics', 'generate_leetcode_url', 'get_theme', 'get_themed_template', 'today_iso']
@@ -0,0 +1,28 @@
+"""
+Utility functions for dates.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+# (ISO date string, epoch second at which it stops being today). Replaced as
+# one tuple so concurrent request threads never see a half-updated pair.
+_today = ('', 0.0)
+
+
+def today_iso() -> str:
+    """
+    Return today's local date as an ISO string (YYYY-MM-DD).
+
+    The string is built once and reused until the next local midnight, so
+    hot routes skip the datetime/date/str allocations on every call while
+    still rolling over to the new date exactly at midnight.
+    """
+    global _today
+    iso, expires_at = _today
+    now = time.time()
+    if now >= expires_at:
+        today = date.fromtimestamp(now)
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        iso = today.isoformat()
+        _today = (iso, midnight.timestamp())
+    return iso
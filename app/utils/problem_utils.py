@@ -2,9 +2,43 @@
 Utility functions for problem processing.
 """
 import re
+from functools import lru_cache
 from typing import Tuple, List
 
 
+def _keyword_re(keywords: List[str]) -> re.Pattern:
+    """Compile a keyword list into one substring-matching alternation."""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+
+# Keyword lists are compiled once at import so each classification is one
+# regex scan per bucket rather than a Python-level `in` test per keyword.
+_EASY_RE = _keyword_re(['two sum', 'valid', 'merge', 'reverse', 'palindrome', 'anagram', 'binary search'])
+_HARD_RE = _keyword_re(['median', 'serialize', 'sliding window', 'minimum window', 'trapping', 'word ladder'])
+
+_TOPIC_KEYWORDS = {
+    'Array': ['array', 'sum', 'product', 'subarray', 'rotate'],
+    'String': ['string', 'palindrome', 'anagram', 'word', 'character'],
+    'Binary Tree': ['tree', 'binary tree', 'bst', 'node'],
+    'Linked List': ['linked list', 'list cycle', 'merge'],
+    'Graph': ['graph', 'dfs', 'bfs', 'island', 'clone'],
+    'Dynamic Programming': ['dynamic programming', 'dp', 'coin', 'climb', 'house robber'],
+    'Binary Search': ['binary search', 'search', 'find'],
+    'Stack': ['stack', 'queue', 'parentheses', 'calculator'],
+    'Heap': ['heap', 'priority', 'kth', 'median'],
+    'Hash Table': ['hash', 'map', 'set'],
+    'Sorting': ['sort', 'merge'],
+    'Matrix': ['matrix', 'grid', '2d'],
+    'Backtracking': ['backtrack', 'permutation', 'combination'],
+    'Trie': ['trie', 'prefix'],
+    'Bit Manipulation': ['bit', 'xor', 'and', 'or'],
+}
+
+_TOPIC_RES = {topic: _keyword_re(keywords) for topic, keywords in _TOPIC_KEYWORDS.items()}
+
+_TIME_ESTIMATES = {'Easy': 20, 'Medium': 30, 'Hard': 45}
+
+
 def estimate_difficulty_and_topics(problem_name: str) -> Tuple[str, List[str], int]:
     """
     Estimate difficulty and topics based on problem name.
@@ -15,49 +49,37 @@ def estimate_difficulty_and_topics(problem_name: str) -> Tuple[str, List[str], i
     Returns:
         Tuple of (difficulty, topics, estimated_time_minutes)
     """
-    name_lower = problem_name.lower()
+    difficulty, topics, time = _classify_problem(problem_name.lower())
+    return difficulty, list(topics), time
+
 
+@lru_cache(maxsize=4096)
+def _classify_problem(name_lower: str) -> Tuple[str, Tuple[str, ...], int]:
+    """
+    Memoized keyword classification for a lowercased problem name.
+
+    The same titles recur across the advanced and intermediate roadmaps, so
+    results are cached; topics come back as a tuple so cached entries can't
+    be mutated by callers.
+    """
     # Difficulty estimation based on common patterns
     difficulty = 'Medium'
-    if any(keyword in name_lower for keyword in ['two sum', 'valid', 'merge', 'reverse', 'palindrome', 'anagram', 'binary search']):
+    if _EASY_RE.search(name_lower):
         difficulty = 'Easy'
-    elif any(keyword in name_lower for keyword in ['median', 'serialize', 'sliding window', 'minimum window', 'trapping', 'word ladder']):
+    elif _HARD_RE.search(name_lower):
         difficulty = 'Hard'
 
     # Topic estimation based on problem name patterns
-    topics = []
-
-    topic_patterns = {
-        'Array': ['array', 'sum', 'product', 'subarray', 'rotate'],
-        'String': ['string', 'palindrome', 'anagram', 'word', 'character'],
-        'Binary Tree': ['tree', 'binary tree', 'bst', 'node'],
-        'Linked List': ['linked list', 'list cycle', 'merge'],
-        'Graph': ['graph', 'dfs', 'bfs', 'island', 'clone'],
-        'Dynamic Programming': ['dynamic programming', 'dp', 'coin', 'climb', 'house robber'],
-        'Binary Search': ['binary search', 'search', 'find'],
-        'Stack': ['stack', 'queue', 'parentheses', 'calculator'],
-        'Heap': ['heap', 'priority', 'kth', 'median'],
-        'Hash Table': ['hash', 'map', 'set'],
-        'Sorting': ['sort', 'merge'],
-        'Matrix': ['matrix', 'grid', '2d'],
-        'Backtracking': ['backtrack', 'permutation', 'combination'],
-        'Trie': ['trie', 'prefix'],
-        'Bit Manipulation': ['bit', 'xor', 'and', 'or'],
-    }
-
-    for topic, keywords in topic_patterns.items():
-        if any(keyword in name_lower for keyword in keywords):
-            topics.append(topic)
+    topics = [topic for topic, pattern in _TOPIC_RES.items() if pattern.search(name_lower)]
 
     # Default topics if none detected
     if not topics:
         topics = ['Algorithm']
 
     # Time estimation based on difficulty
-    time_estimates = {'Easy': 20, 'Medium': 30, 'Hard': 45}
-    time = time_estimates.get(difficulty, 30)
+    time = _TIME_ESTIMATES.get(difficulty, 30)
 
-    return difficulty, topics, time
+    return difficulty, tuple(topics), time
 
 
 def generate_leetcode_url(problem_name: str) -> str:
@@ -0,0 +1,41 @@
+"""
+Utility functions for template selection.
+"""
+from flask import current_app, request
+
+# Supported values of the `theme` cookie; anything else falls back to the first
+THEMES = ('dark', 'legacy')
+
+
+def get_theme() -> str:
+    """
+    Get the current request's theme, normalized to one of THEMES.
+
+    The cookie is client-controlled, so unknown values are mapped to 'dark'
+    before they reach template selection, the context processor or a page
+    cache key (where each distinct value would be a new cache entry).
+    """
+    theme = request.cookies.get('theme', 'dark')
+    return theme if theme in THEMES else 'dark'
+
+
+def get_themed_template(base_name: str) -> str:
+    """
+    Get the appropriate template based on user's theme preference.
+
+    Args:
+        base_name: Base template name without extension (e.g., 'classroom', 'auth/login')
+
+    Returns:
+        Template path based on theme ('dark' = *_tw.html, 'legacy' = *.html)
+    """
+    resolved = current_app.themed_templates.get(base_name)
+    if resolved is None:
+        # Resolve once per base name: (dark-theme choice, legacy template)
+        legacy_template = f"{base_name}.html"
+        tw_template = f"{base_name}_tw.html"
+        # Template names are indexed at startup (create_app), so no per-request stat
+        dark_template = tw_template if tw_template in current_app.template_names else legacy_template
+        resolved = current_app.themed_templates[base_name] = (dark_template, legacy_template)
+
+    return resolved[0] if get_theme() == 'dark' else resolved[1]
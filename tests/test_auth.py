@@ -9,7 +9,10 @@ from app.auth.access import (
     has_ai_access,
     has_system_design_access,
     has_guides_access,
-    is_allowed_user
+    is_allowed_user,
+    is_admin,
+    compute_access,
+    get_current_access
 )
 
 
@@ -53,6 +56,14 @@ class TestHasPremiumAccess:
         }
         assert has_premium_access(user) is False
 
+    def test_handles_null_metadata(self):
+        """Test that null metadata blocks (as Clerk may return) are treated as empty."""
+        user = {
+            'private_metadata': None,
+            'public_metadata': None
+        }
+        assert has_premium_access(user) is False
+
 
 class TestHasAiAccess:
     """Tests for has_ai_access function."""
@@ -131,6 +142,27 @@ class TestIsAllowedUser:
         }
         assert is_allowed_user(user) is True
 
+    def test_uses_app_configured_allowlist(self, app, app_context):
+        """Test that the allowlist comes from the running app's config."""
+        user = {'email_addresses': [{'email_address': 'extra@example.com'}]}
+        assert is_allowed_user(user) is False
+
+        app.config['ALLOWED_EMAILS'] = frozenset({'extra@example.com'})
+        assert is_allowed_user(user) is True
+
+    def test_email_match_is_case_insensitive(self, app, app_context):
+        """Test that allowlisted emails match regardless of case."""
+        user = {'email_addresses': [{'email_address': 'Admin@Example.com'}]}
+        assert is_allowed_user(user) is True
+
+    def test_prefers_pre_extracted_primary_email(self, app, app_context):
+        """Test that the session's pre-extracted primary email is used when present."""
+        user = {
+            '_primary_email': 'admin@example.com',
+            'email_addresses': [{'email_address': 'random@example.com'}]
+        }
+        assert is_allowed_user(user) is True
+
 
 class TestGetCurrentUser:
     """Tests for get_current_user function."""
@@ -192,6 +224,25 @@ class TestHasGuidesAccess:
         user = {'private_metadata': {}}
         assert has_guides_access(user) is False
 
+    def test_checks_admin_flag_once(self):
+        """Test that the admin check isn't repeated for the guides fallback."""
+        from unittest.mock import patch
+        from app.auth import access
+
+        user = {'private_metadata': {'has_guides_access': True}}
+        with patch.object(access, '_has_admin_flag', wraps=access._has_admin_flag) as mock_admin:
+            assert has_guides_access(user) is True
+        assert mock_admin.call_count == 1
+
+    @pytest.mark.parametrize('private_metadata', [
+        {}, {'is_admin': True}, {'has_premium': True}, {'has_guides_access': True},
+        {'has_premium': False, 'has_guides_access': False},
+    ])
+    def test_matches_compute_access(self, app_context, private_metadata):
+        """Test that the single-flag check agrees with compute_access."""
+        user = {'private_metadata': private_metadata}
+        assert has_guides_access(user) is compute_access(user).guides
+
 
 class TestAdminHasAllAccess:
     """Tests that admin users have all access types."""
@@ -231,3 +282,117 @@ class TestAdminHasAllAccess:
         assert has_ai_access(user) is False
         assert has_system_design_access(user) is False
         assert has_guides_access(user) is False
+
+
+class TestComputeAccess:
+    """Tests for compute_access batching every flag in one pass."""
+
+    @pytest.mark.parametrize('user', [
+        None,
+        {},
+        {'private_metadata': {'has_premium': True}},
+        {'private_metadata': {'has_premium': False}, 'public_metadata': {'has_premium': True}},
+        {'public_metadata': {'has_ai_access': True, 'has_guides_access': True}},
+        {'private_metadata': {'is_admin': True}},
+        {'public_metadata': {'specialAccess': True}},
+        {'email_addresses': [{'email_address': 'admin@example.com'}]},
+        {'private_metadata': None, 'public_metadata': {'has_system_design_access': True}},
+    ])
+    def test_matches_individual_checks(self, app_context, user):
+        """Test that batched flags agree with the individual access functions."""
+        access = compute_access(user)
+        assert access.premium is has_premium_access(user)
+        assert access.ai is has_ai_access(user)
+        assert access.system_design is has_system_design_access(user)
+        assert access.guides is has_guides_access(user)
+        assert access.allowed is is_allowed_user(user)
+        assert access.admin is is_admin(user)
+        assert access.authenticated is bool(user)
+
+    def test_logged_in_user_without_flags_is_authenticated(self, app_context):
+        """Test that login state is distinguishable from having no access."""
+        assert compute_access({'id': 'user_123'}) != compute_access(None)
+
+
+class TestGetCurrentAccess:
+    """Tests for the per-request memoized access flags."""
+
+    def test_computes_once_per_request(self, app):
+        """Test that repeated lookups in one request reuse the first result."""
+        from unittest.mock import patch
+
+        with app.test_request_context():
+            session['user'] = {'private_metadata': {'has_premium': True}}
+            with patch('app.auth.access.compute_access', wraps=compute_access) as mock_compute:
+                assert get_current_access().premium is True
+                assert get_current_access().premium is True
+            mock_compute.assert_called_once()
+
+    def test_recomputes_when_session_user_changes(self, app):
+        """Test that logging in mid-request isn't masked by a stale result."""
+        with app.test_request_context():
+            assert get_current_access().premium is False
+            session['user'] = {'private_metadata': {'has_premium': True}}
+            assert get_current_access().premium is True
+
+
+class TestAccessDecorators:
+    """Tests for the access-gating route decorators."""
+
+    def test_premium_required_allows_premium_user(self, app):
+        """Test that a premium user reaches the wrapped view."""
+        from app.auth.decorators import premium_required
+
+        view = premium_required(lambda: 'ok')
+        with app.test_request_context():
+            session['user'] = {'private_metadata': {'has_premium': True}}
+            assert view() == 'ok'
+
+    def test_premium_required_redirects_without_flag(self, app):
+        """Test that a logged-in user without the flag is sent to /landing."""
+        from app.auth.decorators import premium_required
+
+        view = premium_required(lambda: 'ok')
+        with app.test_request_context():
+            session['user'] = {'private_metadata': {'has_ai_access': True}}
+            response = view()
+            assert response.status_code == 302
+            assert response.location == '/landing'
+
+    def test_allowlisted_user_passes_every_gate(self, app):
+        """Test that allowlisted users pass gates they have no flag for."""
+        from app.auth.decorators import ai_access_required, system_design_access_required
+
+        with app.test_request_context():
+            session['user'] = {'email_addresses': [{'email_address': 'admin@example.com'}]}
+            assert ai_access_required(lambda: 'ok')() == 'ok'
+            assert system_design_access_required(lambda: 'ok')() == 'ok'
+
+    def test_admin_required_sends_non_admins_home(self, app):
+        """Test that logged-in non-admins go to / and logged-out users to /landing."""
+        from app.auth.decorators import admin_required
+
+        view = admin_required(lambda: 'ok')
+        with app.test_request_context():
+            assert view().location == '/landing'
+            session['user'] = {'private_metadata': {'has_premium': True}}
+            assert view().location == '/'
+            session['user'] = {'private_metadata': {'is_admin': True}}
+            assert view() == 'ok'
+
+    def test_login_required_only_needs_a_user(self, app):
+        """Test that login_required admits any logged-in user."""
+        from app.auth.decorators import login_required
+
+        view = login_required(lambda: 'ok')
+        with app.test_request_context():
+            assert view().location == '/landing'
+            session['user'] = {'id': 'user_123'}
+            assert view() == 'ok'
+
+    def test_guards_keep_wrapped_view_metadata(self, app):
+        """Test that guards expose the view's name and cache helpers (functools.wraps)."""
+        view = app.view_functions['main.behavioral_guide']
+        assert view.__name__ == 'behavioral_guide'
+        assert hasattr(view, 'uncached')
+        assert view.__wrapped__ is not None
@@ -112,6 +112,60 @@ class TestProblemCompletionWorkflow:
         )
         assert response.status_code == 400
 
+    def test_complete_problem_sends_only_changed_fields(self, app, enrolled_user_client):
+        """Test completing a problem merges a partial challenge patch into Clerk."""
+        with patch.object(app.clerk, 'merge_user_metadata') as mock_merge:
+            response = enrolled_user_client.post(
+                '/api/challenge/complete-problem',
+                data=json.dumps({'day': 1, 'problem_id': 'two-sum'}),
+                content_type='application/json'
+            )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)['challenge']['total_problems_solved'] == 1
+
+        user_id = mock_merge.call_args.args[0]
+        changes = mock_merge.call_args.kwargs['public_metadata']['challenge']
+        assert user_id == 'user_enrolled'
+        assert changes['problems_solved'] == {'day_1': ['two-sum']}
+        assert changes['total_problems_solved'] == 1
+        assert list(changes['activity_log']) == [changes['last_activity_date'][:10]]
+        assert changes['achievements'] == ['first_problem']
+        assert 'enrolled' not in changes
+        assert 'start_date' not in changes
+
+    def test_complete_problem_resums_stale_total(self, app, enrolled_user_client):
+        """Test the total is re-derived from problems_solved rather than incremented."""
+        with enrolled_user_client.session_transaction() as sess:
+            user = sess['user']
+            user['public_metadata']['challenge']['problems_solved'] = {'day_1': ['two-sum', 'valid-anagram']}
+            sess['user'] = user
+
+        with patch.object(app.clerk, 'merge_user_metadata') as mock_merge:
+            response = enrolled_user_client.post(
+                '/api/challenge/complete-problem',
+                data=json.dumps({'day': 2, 'problem_id': 'contains-duplicate'}),
+                content_type='application/json'
+            )
+
+        assert json.loads(response.data)['challenge']['total_problems_solved'] == 3
+        assert mock_merge.call_args.kwargs['public_metadata']['challenge']['total_problems_solved'] == 3
+
+    def test_complete_problem_failed_merge_returns_error(self, app, enrolled_user_client):
+        """Test a failed Clerk merge is reported and the problem stays unsolved in the session."""
+        with patch.object(app.clerk, 'merge_user_metadata', return_value=None):
+            response = enrolled_user_client.post(
+                '/api/challenge/complete-problem',
+                data=json.dumps({'day': 1, 'problem_id': 'two-sum'}),
+                content_type='application/json'
+            )
+
+        assert response.status_code == 500
+        with enrolled_user_client.session_transaction() as sess:
+            challenge = sess['user']['public_metadata']['challenge']
+        assert challenge['problems_solved'] == {}
+        assert challenge['total_problems_solved'] == 0
+
     def test_complete_problem_unenrolled_user_fails(self, app):
         """Test complete problem fails for unenrolled user."""
         client = app.test_client()
@@ -294,12 +348,13 @@ class TestSkoolSubmissionWorkflow:
 
     def test_submit_skool_rejects_non_skool_urls(self, enrolled_client_for_skool):
         """Test non-skool.com URLs are rejected."""
-        # Note: Current implementation checks if 'skool.com' is in URL
-        # So 'fake-skool.com' and 'skool.com' without https would pass
         invalid_urls = [
             'https://google.com',
             'https://leetcode.com/problems/two-sum',
             'https://github.com',
+            'https://fake-skool.com/post',
+            'https://evil.example/?next=skool.com',
+            'https://skool.com/' + 'a' * 2048,
         ]
 
         for url in invalid_urls:
@@ -490,6 +545,98 @@ class TestChallengeProgressAPI:
         assert isinstance(data['achievements'], list)
 
 
+class TestDailyActivityLogAPI:
+    """Test daily progress tracker logging."""
+
+    ENTRY = {
+        'new_problems': 2, 'revised_problems': 1, 'github_commits': 0,
+        'skool_activity': 0, 'comments_done': 0, 'social_posts': 0, 'mock_interviews': 0
+    }
+
+    def _client(self, app, tracker_log):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user'] = {
+                'id': 'user_tracker',
+                'email_addresses': [{'email_address': 'tracker@example.com'}],
+                'private_metadata': {'has_premium': True},
+                'public_metadata': {
+                    'challenge': {
+                        'enrolled': True,
+                        'trackers': {'new_problems': 2, 'revised_problems': 1},
+                        'tracker_log': tracker_log
+                    }
+                }
+            }
+        return client
+
+    def test_new_values_are_saved(self, app):
+        """Test logging changed tracker values merges only today's entry into Clerk."""
+        client = self._client(app, {'2020-01-01': dict(self.ENTRY)})
+        with patch.object(app.clerk, 'merge_user_metadata', return_value={'id': 'user_tracker'}) as mock_update:
+            response = client.post('/api/challenge/log-activity', json=self.ENTRY)
+
+        assert response.status_code == 200
+        assert response.get_json()['trackers']['new_problems'] == 4
+        sent = mock_update.call_args.kwargs['public_metadata']
+        assert sent['challenge']['tracker_log'] == {datetime.now().date().isoformat(): self.ENTRY}
+
+    def test_updating_today_applies_only_the_delta(self, app):
+        """Test re-logging today adds the difference, and null counts are stored as 0."""
+        today = datetime.now().date().isoformat()
+        client = self._client(app, {today: dict(self.ENTRY)})
+        with patch.object(app.clerk, 'merge_user_metadata',
+                          return_value={'id': 'user_tracker'}) as mock_update:
+            response = client.post('/api/challenge/log-activity',
+                                   json=dict(self.ENTRY, new_problems=5, github_commits=None,
+                                             leetcode_rank=12345))
+
+        trackers = response.get_json()['trackers']
+        assert trackers['new_problems'] == 5
+        assert trackers['revised_problems'] == 1
+        assert trackers['leetcode_rank'] == 12345
+        sent = mock_update.call_args.kwargs['public_metadata']['challenge']
+        assert set(sent) == {'trackers', 'tracker_log'}
+        assert list(sent['tracker_log']) == [today]
+        saved = sent['tracker_log'][today]
+        assert saved['github_commits'] == 0
+        assert saved['leetcode_rank'] == 12345
+
+    def test_resubmitting_same_values_skips_clerk_write(self, app):
+        """Test that logging today's unchanged values makes no Clerk call."""
+        today = datetime.now().date().isoformat()
+        client = self._client(app, {today: dict(self.ENTRY)})
+        with patch.object(app.clerk, 'merge_user_metadata') as mock_update:
+            response = client.post('/api/challenge/log-activity', json=self.ENTRY)
+
+        assert response.get_json()['status'] == 'success'
+        assert response.get_json()['trackers']['new_problems'] == 2
+        mock_update.assert_not_called()
+
+    def test_failed_write_is_reported_and_session_kept(self, app):
+        """Test a failed Clerk write returns an error and leaves the session totals alone."""
+        client = self._client(app, {'2020-01-01': dict(self.ENTRY)})
+        with patch.object(app.clerk, 'merge_user_metadata', return_value=None):
+            response = client.post('/api/challenge/log-activity', json=self.ENTRY)
+
+        assert response.status_code == 500
+        with client.session_transaction() as sess:
+            challenge = sess['user']['public_metadata']['challenge']
+        assert challenge['trackers']['new_problems'] == 2
+        assert list(challenge['tracker_log']) == ['2020-01-01']
+
+    def test_saved_write_updates_session(self, app):
+        """Test a successful write carries the new totals into the session."""
+        client = self._client(app, {'2020-01-01': dict(self.ENTRY)})
+        with patch.object(app.clerk, 'merge_user_metadata', return_value={'id': 'user_tracker'}):
+            client.post('/api/challenge/log-activity', json=self.ENTRY)
+
+        with client.session_transaction() as sess:
+            challenge = sess['user']['public_metadata']['challenge']
+        assert challenge['trackers']['new_problems'] == 4
+        assert datetime.now().date().isoformat() in challenge['tracker_log']
+
+
 class TestUnauthenticatedAPIAccess:
     """Test API endpoints properly reject unauthenticated requests."""
 
@@ -594,6 +741,27 @@ class TestCalendarViewData:
         # Just verify the calendar page loads with the title section
         assert b'28-Day Challenge' in response.data
 
+    def test_calendar_days_carry_dates_and_progress(self, app, enrolled_calendar_client):
+        """Test each calendar day gets its date, completion and lock state."""
+        from flask import template_rendered
+
+        rendered = []
+
+        def record(sender, template, context, **extra):
+            rendered.append(context)
+
+        with template_rendered.connected_to(record, app):
+            enrolled_calendar_client.get('/challenge/calendar')
+
+        days = rendered[0]['calendar_days']
+        start = (datetime.now() - timedelta(days=4)).date()
+        assert [d['day'] for d in days] == list(range(1, 29))
+        assert days[0]['date'] == start
+        assert days[27]['date'] == start + timedelta(days=27)
+        assert [d['day'] for d in days if d['is_completed']] == [1, 2, 3]
+        assert days[4]['is_current'] and not days[4]['is_locked']
+        assert days[5]['is_locked'] and not days[5]['is_available']
+
     def test_calendar_contains_stats(self, enrolled_calendar_client):
         """Test calendar contains stats section."""
         response = enrolled_calendar_client.get('/challenge/calendar')
@@ -676,6 +844,45 @@ class TestBonusProblemsAPI:
         # Should succeed or fail gracefully (Clerk not available in tests)
         assert response.status_code in [200, 500]
 
+    def test_bonus_problem_rejects_leetcode_path_elsewhere_in_url(self, enrolled_client_for_bonus):
+        """Test the LeetCode check is anchored to the start of the URL."""
+        response = enrolled_client_for_bonus.post(
+            '/api/challenge/bonus-problem',
+            data=json.dumps({'url': 'https://evil.example/leetcode.com/problems/two-sum/'}),
+            content_type='application/json'
+        )
+        assert response.status_code == 400
+
+    def test_bonus_problem_duplicate_ignores_url_variant(self, app):
+        """Test a bonus problem already submitted under another URL form isn't added twice."""
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user'] = {
+                'id': 'user_bonus',
+                'email_addresses': [{'email_address': 'bonus@example.com'}],
+                'private_metadata': {'has_premium': True},
+                'public_metadata': {
+                    'challenge': {
+                        'enrolled': True,
+                        'bonus_problems': [
+                            {'name': 'Legacy Entry'},
+                            {'url': 'https://leetcode.com/problems/two-sum/', 'name': 'Two Sum'},
+                            {'url': 'https://leetcode.com/problems/3sum/', 'slug': '3sum', 'name': '3Sum'}
+                        ]
+                    }
+                }
+            }
+
+        for url in ('https://leetcode.com/problems/two-sum',
+                    'https://leetcode.com/problems/two-sum/description/?envType=daily-question',
+                    'https://www.leetcode.com/problems/3sum/'):
+            response = client.post(
+                '/api/challenge/bonus-problem',
+                data=json.dumps({'url': url}),
+                content_type='application/json'
+            )
+            assert json.loads(response.data) == {'status': 'already_added'}, url
+
 
 class TestDayViewData:
     """Test day view contains expected data."""
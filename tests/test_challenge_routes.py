@@ -33,6 +33,38 @@ class TestChallengeHome:
         assert b'28-Day' in response.data or b'Challenge' in response.data
 
 
+    def test_challenge_home_heatmap_counts_activity(self, app):
+        """Test the enrolled heatmap covers the past year and carries the user's counts."""
+        from datetime import date
+        from flask import template_rendered
+
+        today = date.today().isoformat()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user'] = {
+                'id': 'user_heatmap',
+                'email_addresses': [{'email_address': 'heatmap@example.com'}],
+                'public_metadata': {'challenge': {
+                    'enrolled': True,
+                    'start_date': today,
+                    'activity_log': {today: {'count': 3, 'problems': []}}
+                }}
+            }
+
+        rendered = []
+
+        def record(sender, template, context, **extra):
+            rendered.append(context)
+
+        with template_rendered.connected_to(record, app):
+            assert client.get('/challenge/').status_code == 200
+
+        heatmap = rendered[0]['heatmap_data']
+        assert len(heatmap) == 366
+        assert heatmap[-1] == {'date': today, 'count': 3, 'weekday': date.today().weekday()}
+        assert sum(day['count'] for day in heatmap) == 3
+
+
 class TestChallengeDayView:
     """Test challenge day view pages."""
 
@@ -114,6 +114,20 @@ class TestGetProblem:
         assert problem is None
 
 
+    def test_get_problem_requires_matching_day(self):
+        """Test that a problem ID from one day isn't found under another day."""
+        service = ChallengeService()
+        assert service.get_problem(2, 'concatenate-non-zero-digits-and-multiply-by-sum-i') is None
+
+    def test_indexed_lookups_match_day_list(self):
+        """Test that the prebuilt indexes agree with the raw day list."""
+        service = ChallengeService()
+        for day in service.get_challenge_days():
+            assert service.get_day_problems(day['day']) is day.get('problems', [])
+            for problem in day.get('problems', []):
+                assert service.get_problem(day['day'], problem['id']) is problem
+                assert service.get_problem_by_id(problem['id']) is problem
+
 class TestGetDayTheme:
     """Test getting day themes."""
 
@@ -130,6 +144,19 @@ class TestGetDayTheme:
         assert theme == 'Day 99'
 
 
+class TestGetDaySummaries:
+    """Test precomputed calendar day summaries."""
+
+    def test_summaries_match_day_lookups(self):
+        """Test each summary matches the per-day theme and problem count."""
+        service = ChallengeService()
+        summaries = service.get_day_summaries()
+        assert len(summaries) == ChallengeService.CALENDAR_DAYS
+        for day, (theme, problem_count) in enumerate(summaries, start=1):
+            assert theme == service.get_day_theme(day)
+            assert problem_count == len(service.get_day_problems(day))
+
+
 class TestCalculateCurrentDay:
     """Test current day calculations."""
 
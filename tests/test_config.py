@@ -21,13 +21,21 @@ class TestConfig:
     def test_stripe_product_metadata_exists(self):
         """Test that Stripe product metadata is defined."""
         assert hasattr(Config, 'STRIPE_PRODUCT_METADATA')
-        assert isinstance(Config.STRIPE_PRODUCT_METADATA, dict)
         assert len(Config.STRIPE_PRODUCT_METADATA) >= 1
 
+    def test_stripe_product_metadata_is_read_only(self):
+        """Test that product metadata shared across webhook threads can't be mutated."""
+        with pytest.raises(TypeError):
+            Config.STRIPE_PRODUCT_METADATA['prod_new'] = {}
+        for metadata in Config.STRIPE_PRODUCT_METADATA.values():
+            with pytest.raises(TypeError):
+                metadata['has_premium'] = False
+
     def test_allowed_emails_exists(self):
         """Test that allowed emails list is defined."""
         assert hasattr(Config, 'ALLOWED_EMAILS')
-        assert isinstance(Config.ALLOWED_EMAILS, list)
+        assert isinstance(Config.ALLOWED_EMAILS, frozenset)
+        assert all(email == email.lower() for email in Config.ALLOWED_EMAILS)
 
     def test_month_mappings_exist(self):
         """Test that month mappings are defined."""
@@ -62,6 +70,11 @@ class TestProductionConfig:
         """Test that testing mode is disabled in production."""
         assert ProductionConfig.TESTING is False
 
+    def test_app_logger_uses_log_level(self, app):
+        """Test that the app logger level comes from LOG_LEVEL config."""
+        import logging
+        assert app.logger.level == logging.getLevelName(app.config['LOG_LEVEL'])
+
 
 class TestTestingConfig:
     """Tests for TestingConfig."""
@@ -75,6 +88,28 @@ class TestTestingConfig:
         assert TestingConfig.TESTING is True
 
 
+class TestLoadEnvFile:
+    """Tests for .env loading."""
+
+    @pytest.mark.parametrize('env, loads', [
+        ({'FLASK_ENV': 'development'}, True),
+        ({'FLASK_ENV': 'production'}, False),
+        ({'FLASK_ENV': 'development', 'DOTENV_DISABLE': '1'}, False),
+    ])
+    def test_only_reads_dotenv_outside_production(self, monkeypatch, env, loads):
+        """Test that .env is parsed in development but skipped in production."""
+        import importlib
+        from unittest.mock import patch
+        config_module = importlib.import_module('app.config')
+
+        monkeypatch.delenv('DOTENV_DISABLE', raising=False)
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        with patch.object(config_module, 'load_dotenv') as mock_load:
+            config_module._load_env_file()
+        assert mock_load.called is loads
+
+
 class TestGetConfig:
     """Tests for get_config function."""
 
@@ -82,3 +117,72 @@ class TestGetConfig:
         """Test that get_config returns a config class."""
         config = get_config()
         assert config is not None
+
+    def test_resolves_environment_once(self, monkeypatch):
+        """Test that the config class is cached after the first lookup."""
+        get_config.cache_clear()
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        try:
+            assert get_config() is ProductionConfig
+            monkeypatch.setenv('FLASK_ENV', 'development')
+            assert get_config() is ProductionConfig
+        finally:
+            get_config.cache_clear()
+
+    def test_create_app_defaults_to_get_config(self, monkeypatch):
+        """Test that create_app() without a name uses the get_config() class."""
+        from app import create_app
+
+        get_config.cache_clear()
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        try:
+            assert create_app().debug is False
+        finally:
+            get_config.cache_clear()
+
+
+class TestLogQueue:
+    """Tests for background log output."""
+
+    def test_stream_handler_is_moved_behind_a_queue(self, app, monkeypatch):
+        """Test that LOG_QUEUE swaps Flask's stream handler for a queue handler."""
+        from logging.handlers import QueueHandler
+        from flask.logging import default_handler
+        from app import _init_logging
+
+        monkeypatch.setattr(app.logger, 'handlers', [default_handler])
+        app.config['LOG_QUEUE'] = True
+        _init_logging(app)
+
+        assert default_handler not in app.logger.handlers
+        assert [type(h) for h in app.logger.handlers] == [QueueHandler]
+
+    def test_disabled_keeps_synchronous_handler(self, app, monkeypatch):
+        """Test that without LOG_QUEUE the handlers are left alone."""
+        from flask.logging import default_handler
+        from app import _init_logging
+
+        monkeypatch.setattr(app.logger, 'handlers', [default_handler])
+        _init_logging(app)
+
+        assert app.logger.handlers == [default_handler]
+
+
+class TestSessionBackend:
+    """Tests for session backend selection."""
+
+    def test_cookie_sessions_by_default(self, app):
+        """Test that the signed-cookie session interface is used without Redis."""
+        from flask.sessions import SecureCookieSessionInterface
+        assert isinstance(app.session_interface, SecureCookieSessionInterface)
+
+    def test_redis_sessions_when_configured(self, monkeypatch):
+        """Test that SESSION_REDIS_URL switches to server-side Redis sessions."""
+        from app import create_app
+        from flask_session.redis import RedisSessionInterface
+
+        monkeypatch.setattr(TestingConfig, 'SESSION_REDIS_URL', 'redis://localhost:6379/0')
+        app = create_app('testing')
+
+        assert app.config['SESSION_TYPE'] == 'redis'
+        assert isinstance(app.session_interface, RedisSessionInterface)
@@ -2,7 +2,8 @@
 Tests for models module.
 """
 import pytest
-from app.models.course import Course, COURSES, get_sorted_courses
+from app.models.course import Course, COURSES, SORTED_COURSES, get_sorted_courses
+from app.models.problem import Problem
 
 
 class TestCourse:
@@ -50,6 +51,13 @@ class TestCourse:
         assert course_dict['is_premium'] is True
         assert course_dict['order'] == 2
 
+    def test_course_to_dict_covers_every_field(self):
+        """Test that to_dict stays in sync with the dataclass fields."""
+        from dataclasses import asdict
+
+        for course in COURSES:
+            assert course.to_dict() == asdict(course)
+
     def test_course_default_image_url(self):
         """Test that image_url has default value."""
         course = Course(
@@ -67,6 +75,15 @@ class TestCourse:
         )
         assert course.image_url == ''
 
+    def test_course_is_frozen_and_slotted(self):
+        """Test that shared Course definitions can't be mutated and carry no __dict__."""
+        from dataclasses import FrozenInstanceError
+
+        course = COURSES[0]
+        assert not hasattr(course, '__dict__')
+        with pytest.raises(FrozenInstanceError):
+            course.title = 'Changed'
+
 
 class TestCourses:
     """Tests for COURSES list."""
@@ -127,3 +144,74 @@ class TestGetSortedCourses:
         for course in courses:
             for field in expected_fields:
                 assert field in course, f"Course should have field: {field}"
+
+    def test_shared_sorted_courses_are_read_only(self):
+        """Test that the import-time course list can be shared without copying."""
+        assert [course['order'] for course in SORTED_COURSES] == sorted(c.order for c in COURSES)
+        with pytest.raises(TypeError):
+            SORTED_COURSES[0]['title'] = 'Changed'
+
+    def test_returns_independent_copies(self):
+        """Test that mutating a returned course doesn't leak into later calls."""
+        first = get_sorted_courses()
+        first[0]['title'] = 'Changed'
+        first.pop()
+        second = get_sorted_courses()
+        assert second[0]['title'] != 'Changed'
+        assert len(second) == len(COURSES)
+
+
+class TestProblem:
+    """Tests for Problem model."""
+
+    def test_round_trip(self):
+        """Test from_dict/to_dict preserve the roadmap JSON shape."""
+        data = {
+            'name': 'Two Sum',
+            'status': 'Accepted',
+            'solved': True,
+            'url': 'https://leetcode.com/problems/two-sum/',
+            'note': 'Hash map warm-up'
+        }
+        assert Problem.from_dict(data).to_dict() == data
+
+    def test_to_dict_omits_empty_note(self):
+        """Test that problems without a note serialize without the key."""
+        problem = Problem.from_dict({'name': 'Two Sum', 'url': 'https://leetcode.com/problems/two-sum/'})
+        assert 'note' not in problem.to_dict()
+
+    def test_uses_slots(self):
+        """Test that Problem instances carry no per-instance dict."""
+        assert not hasattr(Problem('Two Sum'), '__dict__')
+
+
+class TestAppJSONProvider:
+    """Tests for the orjson-backed app JSON provider."""
+
+    def test_serializes_models_via_to_dict(self, app):
+        """Test that dataclass models are encoded with to_dict, not their raw fields."""
+        problem = Problem.from_dict({'name': 'Two Sum', 'url': 'https://leetcode.com/problems/two-sum/'})
+        assert app.json.loads(app.json.dumps([problem])) == [problem.to_dict()]
+
+    def test_datetimes_match_flask_encoding(self, app):
+        """Test that datetimes keep Flask's HTTP date format."""
+        from datetime import datetime
+        from flask.json.provider import DefaultJSONProvider
+
+        value = {'at': datetime(2024, 1, 2, 3, 4, 5)}
+        assert app.json.loads(app.json.dumps(value)) == app.json.loads(DefaultJSONProvider(app).dumps(value))
+
+    def test_request_bodies_are_parsed_with_orjson(self, app):
+        """Test that request.get_json() goes through the orjson-backed provider."""
+        import orjson
+        from unittest.mock import patch
+        from flask import request
+
+        with app.test_request_context('/', method='POST', data=b'{"day": 1}', content_type='application/json'):
+            with patch('app.json_provider.orjson.loads', wraps=orjson.loads) as mock_loads:
+                assert request.get_json() == {'day': 1}
+            mock_loads.assert_called_once()
+
+    def test_unsupported_options_fall_back_to_stdlib(self, app):
+        """Test that options orjson can't express still work."""
+        assert app.json.dumps({'b': 1, 'a': 2}, indent=4) == '{\n    "a": 2,\n    "b": 1\n}'
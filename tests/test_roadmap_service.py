@@ -44,6 +44,13 @@ class TestRoadmapServiceMethods:
         data = service.get_ordered_intermediate_roadmap_data()
         assert isinstance(data, dict)
 
+    def test_ordered_data_is_precomputed(self, app_context, app):
+        """Test ordered roadmap views are built once at load, not per call."""
+        service = app.roadmap
+        assert service.get_ordered_roadmap_data() is service.get_ordered_roadmap_data()
+        assert (service.get_ordered_intermediate_roadmap_data()
+                is service.get_ordered_intermediate_roadmap_data())
+
     def test_get_atcoder_problems(self, app_context, app):
         """Test get_atcoder_problems returns dict."""
         service = app.roadmap
@@ -56,6 +63,25 @@ class TestRoadmapServiceMethods:
         data = service.get_all_problems()
         assert isinstance(data, list)
 
+    def test_get_all_problems_unique_and_numbered(self, app_context, app):
+        """Test every URL appears once and IDs run 1..N across all sources."""
+        data = app.roadmap.get_all_problems()
+        urls = [p['url'] for p in data]
+        assert len(urls) == len(set(urls))
+        assert [p['id'] for p in data] == list(range(1, len(data) + 1))
+
+    def test_additional_problems_skip_seen_urls(self, app_context, app):
+        """Test popular problems are deduped against roadmap URLs and numbered on."""
+        service = app.roadmap
+        seen_urls = {'https://leetcode.com/problems/two-sum/'}
+
+        extra = service._get_additional_problems(seen_urls, 10)
+
+        assert 'Two Sum' not in [p['title'] for p in extra]
+        assert [p['id'] for p in extra] == list(range(11, 11 + len(extra)))
+        assert all(p['url'] in seen_urls for p in extra)
+        assert isinstance(extra[0]['topics'], list)
+
     def test_get_original_month_name(self, app_context, app):
         """Test get_original_month_name conversion."""
         service = app.roadmap
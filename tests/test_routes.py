@@ -181,6 +181,20 @@ class TestAuthRoutes:
         assert 'authenticated' in data
         assert 'has_premium' in data
 
+    def test_auth_debug_lists_session_keys_only(self, client):
+        """Test that auth debug reports session key names, not the raw session."""
+        with client.session_transaction() as sess:
+            sess['user'] = {'id': 'user_123'}
+        data = client.get('/auth/debug').get_json()
+        assert data['session_keys'] == ['user']
+        assert 'session_data' not in data
+
+    def test_auth_debug_hidden_when_debug_off(self, app, client):
+        """Test that auth debug 404s outside debug mode."""
+        app.debug = False
+        response = client.get('/auth/debug')
+        assert response.status_code == 404
+
     def test_auth_callback_requires_post(self, client):
         """Test that auth callback requires POST method."""
         response = client.get('/auth/callback')
@@ -206,6 +220,27 @@ class TestAuthRoutes:
             assert 'user' in sess
             assert sess['user']['id'] == 'test_user'
 
+    def test_auth_callback_stores_compact_user(self, client):
+        """Test that auth callback keeps only the fields the app reads."""
+        client.post('/auth/callback',
+                    json={'user': {
+                        'id': 'test_user',
+                        'email_addresses': [
+                            {'email_address': 'first@example.com', 'id': 'idn_1', 'verification': {}},
+                            {'email_address': 'second@example.com'}
+                        ],
+                        'organization_memberships': [{'id': 'org_1'}],
+                        'public_metadata': {'has_premium': True}
+                    }},
+                    content_type='application/json')
+
+        with client.session_transaction() as sess:
+            user = sess['user']
+            assert user['email_addresses'] == [{'email_address': 'first@example.com'}]
+            assert user['_primary_email'] == 'first@example.com'
+            assert user['public_metadata'] == {'has_premium': True}
+            assert 'organization_memberships' not in user
+
 
 class TestApiRoutes:
     """Tests for API routes."""
@@ -216,6 +251,8 @@ class TestApiRoutes:
         assert response.status_code == 200
         data = response.get_json()
         assert data['status'] == 'API working'
+        assert data['message'] == 'Test successful'
+        assert response.mimetype == 'application/json'
 
     def test_api_roadmap_returns_json(self, client):
         """Test that API roadmap returns JSON."""
@@ -231,6 +268,19 @@ class TestApiRoutes:
         data = response.get_json()
         assert isinstance(data, dict)
 
+    def test_api_roadmap_served_from_cache_with_etag(self, app, client):
+        """Test that the roadmap body is encoded once and revalidates via ETag."""
+        from unittest.mock import patch
+
+        first = client.get('/api/roadmap')
+        assert first.headers['ETag']
+        with patch.object(app.roadmap, 'get_ordered_roadmap_data') as mock_build:
+            second = client.get('/api/roadmap')
+            not_modified = client.get('/api/roadmap', headers={'If-None-Match': first.headers['ETag']})
+            mock_build.assert_not_called()
+        assert second.data == first.data
+        assert not_modified.status_code == 304
+
     def test_api_refresh_requires_post(self, client):
         """Test that API refresh requires POST method."""
         response = client.get('/api/refresh')
@@ -250,6 +300,64 @@ class TestApiRoutes:
         # Will return 200 even on errors for webhook resilience
         assert response.status_code in [200, 400]
 
+    def test_api_rules_registered_once(self, app):
+        """Test that no API URL rule is registered by more than one handler."""
+        rules = [rule.rule for rule in app.url_map.iter_rules() if rule.endpoint.startswith('api.')]
+        assert len(rules) == len(set(rules))
+
+
+class TestThemedTemplates:
+    """Tests for theme-based template selection."""
+
+    def test_resolves_from_startup_index_without_stat(self, app):
+        """Test dark/legacy resolution uses the template index, not the filesystem."""
+        from unittest.mock import patch
+        from app.utils.templating import get_themed_template
+
+        assert 'classroom_tw.html' in app.template_names
+        with patch('os.path.exists') as mock_exists:
+            with app.test_request_context('/'):
+                assert get_themed_template('classroom') == 'classroom_tw.html'
+                assert get_themed_template('no_such_page') == 'no_such_page.html'
+            with app.test_request_context('/', headers={'Cookie': 'theme=legacy'}):
+                assert get_themed_template('classroom') == 'classroom.html'
+            mock_exists.assert_not_called()
+
+    def test_resolution_memoized_per_base_name(self, app):
+        """Test that each base name is resolved once and then served from the app's table."""
+        from app.utils.templating import get_themed_template
+
+        with app.test_request_context('/'):
+            get_themed_template('classroom')
+        assert app.themed_templates['classroom'] == ('classroom_tw.html', 'classroom.html')
+
+        app.template_names = frozenset()
+        with app.test_request_context('/'):
+            assert get_themed_template('classroom') == 'classroom_tw.html'
+
+    def test_refresh_picks_up_new_templates(self, app, monkeypatch):
+        """Test that refresh_template_names re-indexes templates added after startup."""
+        from app import refresh_template_names
+        from app.utils.templating import get_themed_template
+
+        with app.test_request_context('/'):
+            assert get_themed_template('no_such_page') == 'no_such_page.html'
+            names = app.jinja_loader.list_templates() + ['no_such_page_tw.html']
+            monkeypatch.setattr(app.jinja_loader, 'list_templates', lambda: names)
+            refresh_template_names(app)
+            assert get_themed_template('no_such_page') == 'no_such_page_tw.html'
+
+    def test_development_reindexes_per_request(self, monkeypatch):
+        """Test that the dev server refreshes the index while production builds it once."""
+        from app import create_app
+
+        monkeypatch.setenv('CLERK_PUBLISHABLE_KEY', 'pk_test_x')
+        dev_hooks = create_app('development').before_request_funcs.get(None, [])
+        prod_hooks = create_app('production').before_request_funcs.get(None, [])
+
+        assert any(f.__name__ == '_reindex_templates' for f in dev_hooks)
+        assert not any(f.__name__ == '_reindex_templates' for f in prod_hooks)
+
 
 class TestMonthRedirects:
     """Tests for month route redirects."""
@@ -260,3 +368,292 @@ class TestMonthRedirects:
         assert response.status_code == 302
         # URL may be encoded (Month%201) or unencoded (Month 1)
         assert '/intermediate/month/Month' in response.location
+
+
+class TestPageCache:
+    """Tests for rendered page caching."""
+
+    def test_homepage_served_from_cache(self, client):
+        """Test that a second homepage hit skips rendering."""
+        from unittest.mock import patch
+
+        first = client.get('/')
+        with patch('app.routes.main.render_template') as mock_render:
+            second = client.get('/')
+            mock_render.assert_not_called()
+        assert second.data == first.data
+
+    @pytest.mark.parametrize('path', ['/privacy', '/terms'])
+    def test_legal_pages_served_from_cache(self, client, path):
+        """Test that the static legal pages are rendered once per theme/access."""
+        from unittest.mock import patch
+
+        first = client.get(path)
+        with patch('app.routes.main.render_template') as mock_render:
+            second = client.get(path)
+            mock_render.assert_not_called()
+        assert second.data == first.data
+
+    @pytest.mark.parametrize('path', ['/landing', '/about', '/roadmap', '/privacy', '/terms', '/coaching'])
+    def test_marketing_pages_revalidate_with_etag(self, client, path):
+        """Test that a repeat visit with the page's ETag gets an empty 304."""
+        first = client.get(path)
+        etag = first.headers['ETag']
+        assert 'Cookie' in first.headers['Vary']
+
+        second = client.get(path, headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.data == b''
+
+    def test_refresh_clears_only_page_entries(self, app, admin_client):
+        """Test that /api/refresh drops pages and API bodies but keeps other cache entries."""
+        from unittest.mock import patch
+        from app import extensions
+        from app.extensions import cache
+
+        admin_client.get('/landing')
+        admin_client.get('/api/roadmap')
+        with app.app_context():
+            cache.set('stripe:customer_email:cus_1', 'buyer@example.com')
+            keys = [key for key in extensions._issued_page_keys if cache.get(key) is not None]
+        assert any(key.startswith('page:/landing:') for key in keys)
+        assert 'api:roadmap' in keys
+
+        with patch.object(app.roadmap, 'refresh_data'):
+            assert admin_client.post('/api/refresh').get_json()['status'] == 'success'
+
+        with app.app_context():
+            assert all(cache.get(key) is None for key in keys)
+            assert cache.get('stripe:customer_email:cus_1') == 'buyer@example.com'
+
+    def test_clear_page_cache_scans_redis_namespaces(self, app):
+        """Test that on Redis only the prefixed page/api keys are deleted, never FLUSHDB."""
+        from unittest.mock import MagicMock, patch
+        from cachelib import RedisCache
+        from app.extensions import cache, clear_page_cache
+
+        backend = MagicMock(spec=RedisCache)
+        backend.key_prefix = 'roadmap:'
+        client = backend._write_client
+        client.scan_iter.side_effect = lambda match: [match.replace('*', 'x')]
+
+        with app.app_context(), patch.object(type(cache), 'cache', backend):
+            clear_page_cache()
+
+        client.delete.assert_any_call('roadmap:page:x')
+        client.delete.assert_any_call('roadmap:api:x')
+        client.flushdb.assert_not_called()
+        assert app.config['CACHE_KEY_PREFIX'] == 'roadmap:'
+
+    def test_cache_key_normalizes_theme_cookie(self, app):
+        """Test that arbitrary theme cookies can't mint new page cache entries."""
+        from app.extensions import page_cache_key
+
+        keys = set()
+        for theme in ('dark', 'junk-1', 'junk-2', ''):
+            with app.test_request_context('/', headers={'Cookie': f'theme={theme}'}):
+                keys.add(page_cache_key())
+        with app.test_request_context('/', headers={'Cookie': 'theme=legacy'}):
+            legacy_key = page_cache_key()
+
+        assert len(keys) == 1
+        assert legacy_key not in keys
+
+    def test_cache_key_varies_by_access(self, app, mock_user_data):
+        """Test that anonymous and premium viewers get separate cache entries."""
+        from app.extensions import page_cache_key
+
+        with app.test_request_context('/'):
+            anonymous_key = page_cache_key()
+        with app.test_request_context('/'):
+            session['user'] = mock_user_data
+            premium_key = page_cache_key()
+
+        assert anonymous_key != premium_key
+
+    def test_behavioral_questions_are_read_only(self):
+        """Test that the shared behavioral questions can't be mutated per request."""
+        from app.routes.main import BEHAVIORAL_QUESTIONS
+
+        with pytest.raises(TypeError):
+            BEHAVIORAL_QUESTIONS['General'] = ()
+        assert all(isinstance(qs, tuple) for qs in BEHAVIORAL_QUESTIONS.values())
+
+    def test_behavioral_questions_registered_as_template_global(self, app):
+        """Test that templates read the shared questions without a per-render copy."""
+        from app.routes.main import BEHAVIORAL_QUESTIONS
+
+        assert app.jinja_env.globals['behavioral_questions'] is BEHAVIORAL_QUESTIONS
+
+    def test_complete_list_served_from_cache(self, app, authenticated_client):
+        """Test that the complete list isn't rebuilt on every request."""
+        from unittest.mock import patch
+
+        first = authenticated_client.get('/complete-list')
+        assert first.status_code == 200
+        with patch.object(app.roadmap, 'get_all_problems') as mock_build:
+            second = authenticated_client.get('/complete-list')
+            mock_build.assert_not_called()
+        assert second.data == first.data
+
+
+class TestStripeWebhook:
+    """Tests for background processing of verified Stripe webhooks."""
+
+    @staticmethod
+    def _signed_post(client, event):
+        """POST a Stripe-signed event to the webhook endpoint."""
+        import hashlib
+        import hmac
+        import json
+        import time
+        payload = json.dumps(event).encode()
+        timestamp = int(time.time())
+        signature = hmac.new(b'whsec_test', f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+        return client.post('/api/webhooks/stripe', data=payload, content_type='application/json',
+                           headers={'Stripe-Signature': f't={timestamp},v1={signature}'})
+
+    @pytest.fixture
+    def webhook_app(self, app):
+        """App with a webhook secret and an email executor that runs jobs inline."""
+        from unittest.mock import MagicMock
+        from app.services.stripe_service import StripeService
+
+        app.stripe = StripeService(None, 'whsec_test', {'prod_123': {'has_premium': True, 'description': 'Premium'}})
+        app.clerk = MagicMock()
+        app.email_executor = MagicMock()
+        app.email_executor.submit.side_effect = lambda fn, *args: fn(*args)
+        return app
+
+    def test_verified_event_is_provisioned_before_responding(self, webhook_app):
+        """Test that the webhook provisions in Clerk, then answers success and queues the email."""
+        from unittest.mock import patch
+
+        event = {
+            'id': 'evt_accept',
+            'type': 'customer.subscription.updated',
+            'data': {'object': {
+                'customer_email': 'buyer@example.com',
+                'items': {'data': [{'price': {'product': 'prod_123'}}]}
+            }}
+        }
+        with patch('app.services.email_service.EmailService.send_purchase_confirmation_email',
+                   return_value={'success': True}) as mock_email:
+            response = self._signed_post(webhook_app.test_client(), event)
+
+        assert response.get_json() == {'status': 'success', 'email': 'buyer@example.com', 'product': 'Premium'}
+        mock_email.assert_called_once_with(to='buyer@example.com', product_name='Premium')
+        assert webhook_app.email_executor.submit.call_count == 1
+        webhook_app.clerk.provision_users.assert_called_once_with(
+            [('buyer@example.com', {'has_premium': True, 'description': 'Premium'})]
+        )
+
+    def test_every_line_item_product_is_provisioned(self, webhook_app):
+        """Test that a purchase of several products provisions all of them in one batch."""
+        from app.services.stripe_service import StripeService
+
+        webhook_app.stripe = StripeService(None, 'whsec_test', {
+            'prod_123': {'has_premium': True, 'description': 'Premium'},
+            'prod_456': {'has_system_design_access': True, 'description': 'System Design'},
+        })
+        webhook_app.clerk.provision_users.return_value = {'buyer@example.com': True}
+        event = {'id': 'evt_multi', 'type': 'customer.subscription.updated',
+                 'data': {'object': {'customer_email': 'buyer@example.com',
+                                     'items': {'data': [{'price': {'product': 'prod_123'}},
+                                                        {'price': {'product': 'prod_456'}}]}}}}
+
+        response = self._signed_post(webhook_app.test_client(), event)
+
+        assert response.get_json()['product'] == 'Premium, System Design'
+        webhook_app.clerk.provision_users.assert_called_once_with([
+            ('buyer@example.com', {'has_premium': True, 'description': 'Premium'}),
+            ('buyer@example.com', {'has_system_design_access': True, 'description': 'System Design'}),
+        ])
+
+    def test_duplicate_delivery_is_skipped(self, webhook_app):
+        """Test that a redelivered event ID is not processed twice."""
+        event = {'id': 'evt_dup', 'type': 'customer.subscription.deleted',
+                 'data': {'object': {'customer_email': 'gone@example.com',
+                                     'items': {'data': [{'price': {'product': 'prod_123'}}]}}}}
+        client = webhook_app.test_client()
+
+        assert self._signed_post(client, event).get_json() == {'status': 'success', 'action': 'revoked'}
+        assert self._signed_post(client, event).get_json() == {'status': 'duplicate'}
+        webhook_app.clerk.revoke_user_access.assert_called_once_with('gone@example.com')
+
+    def test_page_cache_clear_keeps_event_claims(self, webhook_app):
+        """Test that wiping the page cache doesn't let a redelivered event through."""
+        from app.extensions import cache
+
+        event = {'id': 'evt_clear', 'type': 'customer.subscription.deleted',
+                 'data': {'object': {'customer_email': 'gone@example.com',
+                                     'items': {'data': [{'price': {'product': 'prod_123'}}]}}}}
+        client = webhook_app.test_client()
+
+        assert self._signed_post(client, event).get_json()['status'] == 'success'
+        with webhook_app.app_context():
+            cache.clear()
+        assert self._signed_post(client, event).get_json() == {'status': 'duplicate'}
+        webhook_app.clerk.revoke_user_access.assert_called_once_with('gone@example.com')
+
+    def test_processing_error_is_logged_with_traceback(self, webhook_app, caplog):
+        """Test that a processing exception is logged with its exception info and answered with 500."""
+        webhook_app.clerk.provision_users.side_effect = RuntimeError('clerk down')
+        event = {'id': 'evt_fail', 'type': 'customer.subscription.updated',
+                 'data': {'object': {'customer_email': 'gone@example.com',
+                                     'items': {'data': [{'price': {'product': 'prod_123'}}]}}}}
+
+        with caplog.at_level('ERROR', logger=webhook_app.logger.name):
+            assert self._signed_post(webhook_app.test_client(), event).status_code == 500
+
+        record = next(r for r in caplog.records if 'Error processing Stripe' in r.getMessage())
+        assert record.exc_info[0] is RuntimeError
+
+    @pytest.mark.parametrize('event_type, clerk_method, failed, succeeded', [
+        ('customer.subscription.updated', 'provision_users',
+         {'buyer@example.com': False}, {'buyer@example.com': True}),
+        ('customer.subscription.deleted', 'revoke_user_access', False, True),
+    ])
+    def test_failed_clerk_update_returns_500_and_allows_retry(self, webhook_app, event_type, clerk_method,
+                                                             failed, succeeded):
+        """Test that a failed Clerk update makes Stripe retry, and the retry is processed."""
+        getattr(webhook_app.clerk, clerk_method).return_value = failed
+        event = {'id': f'evt_retry_{clerk_method}', 'type': event_type,
+                 'data': {'object': {'customer_email': 'buyer@example.com',
+                                     'items': {'data': [{'price': {'product': 'prod_123'}}]}}}}
+        client = webhook_app.test_client()
+
+        response = self._signed_post(client, event)
+        assert response.status_code == 500
+        webhook_app.email_executor.submit.assert_not_called()
+
+        getattr(webhook_app.clerk, clerk_method).return_value = succeeded
+        response = self._signed_post(client, event)
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'success'
+        assert getattr(webhook_app.clerk, clerk_method).call_count == 2
+
+    def test_non_ascii_signature_is_rejected(self, webhook_app):
+        """Test that a non-ASCII v1 signature gets a 400 instead of crashing the comparison."""
+        import time
+
+        response = webhook_app.test_client().post(
+            '/api/webhooks/stripe', data=b'{}', content_type='application/json',
+            headers={'Stripe-Signature': f't={int(time.time())},v1=\u00e9'}
+        )
+
+        assert response.status_code == 400
+
+    def test_oversized_payload_is_rejected_before_verification(self, webhook_app):
+        """Test that bodies over MAX_CONTENT_LENGTH get a 413 without touching the verifier."""
+        from unittest.mock import patch
+
+        payload = b'{"pad": "' + b'x' * webhook_app.config['MAX_CONTENT_LENGTH'] + b'"}'
+        with patch.object(webhook_app.stripe, 'verify_webhook') as mock_verify:
+            response = webhook_app.test_client().post(
+                '/api/webhooks/stripe', data=payload, content_type='application/json',
+                headers={'Stripe-Signature': 't=1,v1=abc'}
+            )
+
+        assert response.status_code == 413
+        mock_verify.assert_not_called()
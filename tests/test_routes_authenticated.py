@@ -120,6 +120,16 @@ class TestGuidesRoutesAuthenticated:
         response = full_access_client.get('/guides/behavioral')
         assert response.status_code == 200
 
+    def test_guide_wrapper_served_from_cache(self, guides_client):
+        """Test that a repeat guide hit skips rendering the video config."""
+        from unittest.mock import patch
+
+        first = guides_client.get('/guides/resume')
+        with patch('app.routes.main.render_template') as mock_render:
+            second = guides_client.get('/guides/resume')
+            mock_render.assert_not_called()
+        assert second.data == first.data
+
     def test_guides_resume_accessible_for_allowed_user(self, allowed_user_client):
         """Test that allowed users can access guide wrapper pages."""
         response = allowed_user_client.get('/guides/resume')
@@ -150,6 +160,22 @@ class TestSystemDesignRoutesAuthenticated:
         response = authenticated_client.get('/system-design/low-level-design')
         assert response.status_code == 200
 
+    def test_system_design_served_from_cache(self, authenticated_client):
+        """Test that a repeat system design hit skips rendering."""
+        from unittest.mock import patch
+
+        first = authenticated_client.get('/system-design/trivia')
+        with patch('app.routes.system_design.render_template') as mock_render:
+            second = authenticated_client.get('/system-design/trivia')
+            mock_render.assert_not_called()
+        assert second.data == first.data
+
+    def test_cached_page_not_served_without_access(self, client, authenticated_client):
+        """Test that a page cached for an entitled user still redirects anonymous users."""
+        authenticated_client.get('/system-design/')
+        response = client.get('/system-design/')
+        assert response.status_code == 302
+
 
 class TestAuthDebugWithUser:
     """Tests for auth debug endpoint with authenticated user."""
@@ -208,3 +234,50 @@ class TestContextProcessor:
         """Test context processor with unauthenticated user."""
         response = client.get('/')
         assert response.status_code == 200
+
+
+class TestBehavioralGuideAuthenticated:
+    """Tests for the behavioral guide with an AI-access user."""
+
+    @pytest.mark.parametrize('theme', ['dark', 'legacy'])
+    def test_lists_behavioral_questions(self, full_access_client, theme):
+        """Test that both themes render the questions from the template global."""
+        full_access_client.set_cookie('theme', theme)
+        response = full_access_client.get('/behavioral-guide')
+        assert response.status_code == 200
+        assert b'What are your goals for the future?' in response.data
+
+
+class TestBehavioralFeedbackStream:
+    """Tests for the streaming behavioral feedback endpoint."""
+
+    def test_stream_redirects_without_auth(self, client):
+        """Test that the stream endpoint requires AI access."""
+        response = client.post('/api/behavioral-feedback/stream',
+                               json={'question': 'q', 'story': 's'})
+        assert response.status_code == 302
+
+    def test_stream_requires_question_and_story(self, full_access_client):
+        """Test that missing input is rejected before streaming starts."""
+        response = full_access_client.post('/api/behavioral-feedback/stream',
+                                           json={'question': 'q'})
+        assert response.status_code == 400
+
+    def test_stream_emits_sse_deltas(self, app, full_access_client):
+        """Test that feedback fragments are forwarded as server-sent events."""
+        from unittest.mock import patch
+
+        app.openai.api_key = 'sk-test'
+        with patch.object(app.openai, 'stream_behavioral_feedback',
+                          return_value=iter(['Score: ', '8/10'])):
+            response = full_access_client.post('/api/behavioral-feedback/stream',
+                                               json={'question': 'q', 'story': 's'})
+            body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert body == (
+            'data: {"delta": "Score: "}\n\n'
+            'data: {"delta": "8/10"}\n\n'
+            'data: [DONE]\n\n'
+        )
@@ -1,6 +1,7 @@
 """
 Tests for services module.
 """
+import orjson
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from app.services.clerk_service import ClerkService
@@ -45,7 +46,7 @@ class TestClerkService:
         result = service.get_user_by_email('test@example.com')
         assert result is None
 
-    @patch('app.services.clerk_service.requests.get')
+    @patch('app.services.clerk_service.requests.Session.get')
     def test_get_user_by_email_success(self, mock_get):
         """Test successful user lookup."""
         mock_response = Mock()
@@ -64,7 +65,7 @@ class TestClerkService:
         assert result is not None
         assert result['id'] == 'user_123'
 
-    @patch('app.services.clerk_service.requests.get')
+    @patch('app.services.clerk_service.requests.Session.get')
     def test_get_user_by_email_not_found(self, mock_get):
         """Test user lookup when user not found."""
         mock_response = Mock()
@@ -77,6 +78,197 @@ class TestClerkService:
 
         assert result is None
 
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_get_users_by_emails_single_request(self, mock_get):
+        """Test batched lookup sends one request with repeated email params."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = [
+            {'id': 'user_1', 'email_addresses': [{'email_address': 'a@example.com'}]},
+            {'id': 'user_2', 'email_addresses': [{'email_address': 'b@example.com'}]}
+        ]
+        mock_get.return_value = mock_response
+
+        service = ClerkService(secret_key='test_key')
+        result = service.get_users_by_emails(['a@example.com', 'b@example.com', 'c@example.com'])
+
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs['params'] == [
+            ('limit', ClerkService.USER_LOOKUP_BATCH_SIZE),
+            ('email_address', 'a@example.com'),
+            ('email_address', 'b@example.com'),
+            ('email_address', 'c@example.com')
+        ]
+        assert result['a@example.com']['id'] == 'user_1'
+        assert result['b@example.com']['id'] == 'user_2'
+        assert 'c@example.com' not in result
+
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_get_users_by_emails_chunks_large_batches(self, mock_get):
+        """Test that big lookups are split so no batch can exceed one page of results."""
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=[]))
+        emails = [f'user{i}@example.com' for i in range(ClerkService.USER_LOOKUP_BATCH_SIZE + 1)]
+
+        service = ClerkService(secret_key='test_key')
+        service.get_users_by_emails(emails + emails[:3])
+
+        assert mock_get.call_count == 2
+        sent = [params for call in mock_get.call_args_list for params in call.kwargs['params']]
+        assert sorted(v for k, v in sent if k == 'email_address') == sorted(emails)
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    @patch('app.services.clerk_service.requests.Session.post')
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_provision_users_uses_one_lookup(self, mock_get, mock_post, mock_patch):
+        """Test provision_users updates existing users and creates missing ones."""
+        lookup = Mock(status_code=200)
+        lookup.json.return_value = [
+            {'id': 'user_1', 'email_addresses': [{'email_address': 'a@example.com'}],
+             'private_metadata': {}}
+        ]
+        mock_get.return_value = lookup
+        mock_patch.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'user_1'}))
+        mock_post.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'user_2'}))
+
+        service = ClerkService(secret_key='test_key')
+        result = service.provision_users([
+            ('a@example.com', {'has_premium': True, 'description': 'Premium'}),
+            ('b@example.com', {'has_premium': True, 'description': 'Premium'})
+        ])
+
+        assert result == {'a@example.com': True, 'b@example.com': True}
+        assert mock_get.call_count == 1
+        assert mock_patch.call_count == 1
+        assert mock_post.call_count == 1
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_provision_user_merge_keeps_existing_flags(self, mock_get, mock_patch):
+        """Test that a purchase never revokes flags the user already has."""
+        lookup = Mock(status_code=200)
+        lookup.json.return_value = [
+            {'id': 'user_1', 'email_addresses': [{'email_address': 'a@example.com'}],
+             'private_metadata': {'has_system_design_access': True, 'is_admin': True}}
+        ]
+        mock_get.return_value = lookup
+        mock_patch.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'user_1'}))
+
+        service = ClerkService(secret_key='test_key')
+        service.provision_user('a@example.com', {
+            'has_premium': True,
+            'has_system_design_access': False,
+            'has_ai_access': False,
+            'description': 'Premium Only'
+        })
+
+        payload = orjson.loads(mock_patch.call_args.kwargs['data'])['private_metadata']
+        assert payload == {
+            'has_premium': True,
+            'has_system_design_access': True,
+            'has_ai_access': False,
+            'is_admin': True
+        }
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_provision_users_writes_each_user_once(self, mock_get, mock_patch):
+        """Test items for one user are merged into a single update, users updated in bulk."""
+        lookup = Mock(status_code=200)
+        lookup.json.return_value = [
+            {'id': 'user_1', 'email_addresses': [{'email_address': 'a@example.com'}], 'private_metadata': {}},
+            {'id': 'user_2', 'email_addresses': [{'email_address': 'b@example.com'}], 'private_metadata': {}}
+        ]
+        mock_get.return_value = lookup
+        mock_patch.return_value = Mock(status_code=200, json=Mock(return_value={}))
+
+        service = ClerkService(secret_key='test_key')
+        result = service.provision_users([
+            ('a@example.com', {'has_premium': True}),
+            ('a@example.com', {'has_system_design_access': True}),
+            ('b@example.com', {'has_ai_access': True})
+        ])
+
+        assert result == {'a@example.com': True, 'b@example.com': True}
+        assert mock_patch.call_count == 2
+        payloads = {
+            call.args[0].rsplit('/', 1)[-1]: orjson.loads(call.kwargs['data'])['private_metadata']
+            for call in mock_patch.call_args_list
+        }
+        assert payloads == {
+            'user_1': {'has_premium': True, 'has_system_design_access': True},
+            'user_2': {'has_ai_access': True}
+        }
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    def test_update_metadata_bulk_reports_each_user(self, mock_patch):
+        """Test bulk updates return a result per user ID, None for failures."""
+        ok = Mock(status_code=200, json=Mock(return_value={'id': 'user_1'}))
+        failed = Mock(status_code=500, text='boom')
+        mock_patch.side_effect = lambda url, **kwargs: ok if url.endswith('user_1') else failed
+
+        service = ClerkService(secret_key='test_key')
+        result = service.update_metadata_bulk([('user_1', {'a': 1}), ('user_2', {'b': 2})])
+
+        assert result == {'user_1': {'id': 'user_1'}, 'user_2': None}
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    def test_failures_are_logged_not_printed(self, mock_patch, caplog, capsys):
+        """Test that Clerk errors go to the module logger instead of stdout."""
+        mock_patch.return_value = Mock(status_code=500, text='boom')
+
+        service = ClerkService(secret_key='test_key')
+        with caplog.at_level('ERROR', logger='app.services.clerk_service'):
+            assert service.update_user_metadata('user_1', public_metadata={'a': 1}) is None
+
+        assert 'Failed to update Clerk user user_1: boom' in caplog.text
+        assert capsys.readouterr().out == ''
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    def test_merge_user_metadata_uses_merge_endpoint(self, mock_patch):
+        """Test that partial metadata goes to Clerk's deep-merge endpoint as-is."""
+        mock_patch.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'user_1'}))
+
+        service = ClerkService(secret_key='test_key')
+        result = service.merge_user_metadata('user_1', public_metadata={'challenge': {'points': 10}})
+
+        assert result == {'id': 'user_1'}
+        assert mock_patch.call_args.args[0].endswith('/users/user_1/metadata')
+        assert orjson.loads(mock_patch.call_args.kwargs['data']) == {'public_metadata': {'challenge': {'points': 10}}}
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    def test_merge_user_metadata_without_changes_skips_request(self, mock_patch):
+        """Test that an empty merge makes no API call."""
+        service = ClerkService(secret_key='test_key')
+        assert service.merge_user_metadata('user_1') is None
+        mock_patch.assert_not_called()
+
+    @patch('app.services.clerk_service.requests.Session.patch')
+    @patch('app.services.clerk_service.requests.Session.get')
+    def test_revoke_reuses_cached_user_id(self, mock_get, mock_patch):
+        """Test that a recent lookup lets revocation skip the Clerk user search."""
+        lookup = Mock(status_code=200)
+        lookup.json.return_value = [
+            {'id': 'user_1', 'email_addresses': [{'email_address': 'a@example.com'}]}
+        ]
+        mock_get.return_value = lookup
+        mock_patch.return_value = Mock(status_code=200, json=Mock(return_value={'id': 'user_1'}))
+
+        service = ClerkService(secret_key='test_key')
+        service.get_user_by_email('a@example.com')
+        assert service.revoke_user_access('a@example.com') is True
+
+        assert mock_get.call_count == 1
+        assert mock_patch.call_args.args[0].endswith('/users/user_1')
+
+
+    def test_http_session_pools_clerk_connections(self):
+        """Test that Clerk calls share one pooled, retrying session."""
+        service = ClerkService(secret_key='test_key')
+        adapter = service._session.get_adapter(ClerkService.BASE_URL)
+
+        assert adapter._pool_maxsize == ClerkService.HTTP_POOL_SIZE
+        assert adapter.max_retries.total == 3
+        assert 'PATCH' not in adapter.max_retries.allowed_methods
 
 class TestStripeService:
     """Tests for StripeService."""
@@ -173,6 +365,235 @@ class TestStripeService:
         email = service.extract_customer_email(event)
         assert email == 'details@example.com'
 
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_extract_customer_email_caches_customer_lookup(self, mock_retrieve):
+        """Test repeated events for one customer only hit Stripe once."""
+        mock_retrieve.return_value = Mock(email='cached@example.com')
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        event = {'data': {'object': {'customer': 'cus_123'}}}
+
+        assert service.extract_customer_email(event) == 'cached@example.com'
+        assert service.extract_customer_email(event) == 'cached@example.com'
+        mock_retrieve.assert_called_once_with('cus_123')
+
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_extract_customer_email_does_not_cache_missing_email(self, mock_retrieve):
+        """Test a customer without an email is looked up again on the next event."""
+        mock_retrieve.side_effect = [Mock(email=None), Mock(email='added@example.com')]
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        event = {'data': {'object': {'customer': 'cus_123'}}}
+
+        assert service.extract_customer_email(event) is None
+        assert service.extract_customer_email(event) == 'added@example.com'
+        assert mock_retrieve.call_count == 2
+
+    def test_claim_event_uses_redis_set_nx(self):
+        """Test that event claims are a single SET NX EX on the dedicated store."""
+        store = MagicMock()
+        store.set.side_effect = [True, None]
+        service = StripeService(None, 'whsec_test', {}, event_store=store)
+
+        assert service.claim_event('evt_1') is True
+        assert service.claim_event('evt_1') is False
+        store.set.assert_called_with('stripe-event:evt_1', 1, nx=True, ex=StripeService.EVENT_DEDUP_TIMEOUT)
+
+    def test_release_event_allows_a_new_claim(self):
+        """Test that a released claim can be taken again, with and without Redis."""
+        store = MagicMock()
+        StripeService(None, 'whsec_test', {}, event_store=store).release_event('evt_1')
+        store.delete.assert_called_once_with('stripe-event:evt_1')
+
+        service = StripeService(None, 'whsec_test', {})
+        assert service.claim_event('evt_1') is True
+        service.release_event('evt_1')
+        assert service.claim_event('evt_1') is True
+
+    def test_claim_event_falls_back_to_process_store(self):
+        """Test that claims without Redis are deduplicated within the process."""
+        service = StripeService(None, 'whsec_test', {})
+
+        assert service.claim_event('evt_1') is True
+        assert service.claim_event('evt_1') is False
+        assert service.claim_event('evt_2') is True
+
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_extract_customer_email_uses_shared_cache(self, mock_retrieve):
+        """Test customer emails are read from and stored in the shared cache."""
+        from cachelib import SimpleCache
+
+        mock_retrieve.return_value = Mock(email='fresh@example.com')
+        shared = SimpleCache()
+        shared.set('stripe:customer_email:cus_known', 'known@example.com')
+        service = StripeService('sk_test', 'whsec_test', {}, customer_cache=shared)
+
+        assert service.extract_customer_email({'data': {'object': {'customer': 'cus_known'}}}) == 'known@example.com'
+        mock_retrieve.assert_not_called()
+
+        assert service.extract_customer_email({'data': {'object': {'customer': 'cus_new'}}}) == 'fresh@example.com'
+        assert shared.get('stripe:customer_email:cus_new') == 'fresh@example.com'
+
+    @patch('app.services.stripe_service.stripe.checkout.Session.retrieve')
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_unconfigured_service_skips_stripe_lookups(self, mock_customer, mock_session):
+        """Test that lookups are no-ops when no secret key is configured."""
+        service = StripeService(None, 'whsec_test', {})
+
+        event = {
+            'type': 'checkout.session.completed',
+            'data': {'object': {'id': 'cs_123', 'customer': 'cus_123'}}
+        }
+
+        assert service.extract_customer_email(event) is None
+        assert service.extract_product_id(event) is None
+        mock_customer.assert_not_called()
+        mock_session.assert_not_called()
+
+    @staticmethod
+    def _sign(payload, secret, timestamp=None):
+        """Build a Stripe-Signature header for payload the way Stripe does."""
+        import hashlib
+        import hmac
+        import time
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        signature = hmac.new(secret.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+        return f't={timestamp},v1={signature}'
+
+    def test_verify_webhook_accepts_valid_signature(self):
+        """Test that a correctly signed payload is parsed into an event."""
+        service = StripeService('sk_test', 'whsec_test', {})
+        payload = b'{"id": "evt_1", "type": "checkout.session.completed", "data": {"object": {}}}'
+
+        event = service.verify_webhook(payload, self._sign(payload, 'whsec_test'))
+
+        assert event is not None
+        assert event.get('type') == 'checkout.session.completed'
+
+    def test_verify_webhook_rejects_bad_signature_before_parsing(self):
+        """Test that forged signatures are rejected without parsing the payload."""
+        service = StripeService('sk_test', 'whsec_test', {})
+        payload = b'{"id": "evt_1"}'
+
+        with patch('app.services.stripe_service.json.loads') as mock_loads:
+            assert service.verify_webhook(payload, self._sign(payload, 'whsec_other')) is None
+            assert service.verify_webhook(payload, 'garbage') is None
+            mock_loads.assert_not_called()
+
+    def test_invalid_signature_is_logged_not_printed(self, caplog, capsys):
+        """Test that rejected webhooks go to the logger instead of stdout."""
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        with caplog.at_level('WARNING', logger='app.services.stripe_service'):
+            assert service.verify_webhook(b'{}', 'garbage') is None
+
+        assert 'Invalid webhook signature' in caplog.text
+        assert capsys.readouterr().out == ''
+
+    def test_verify_webhook_rejects_stale_timestamp(self):
+        """Test that replayed webhooks outside the tolerance window are rejected."""
+        import time
+        service = StripeService('sk_test', 'whsec_test', {})
+        payload = b'{"id": "evt_1"}'
+        stale = int(time.time()) - StripeService.WEBHOOK_TOLERANCE - 60
+
+        assert service.verify_webhook(payload, self._sign(payload, 'whsec_test', stale)) is None
+
+    def test_verify_webhook_accepts_slightly_future_timestamp(self):
+        """Test that clock skew putting the timestamp ahead of ours doesn't reject the webhook."""
+        import time
+        service = StripeService('sk_test', 'whsec_test', {})
+        payload = b'{"id": "evt_1", "type": "invoice.payment_succeeded"}'
+        ahead = int(time.time()) + 30
+
+        assert service.verify_webhook(payload, self._sign(payload, 'whsec_test', ahead)) is not None
+
+    def test_verify_webhook_accepts_any_rotated_secret(self):
+        """Test that either of two comma-separated signing secrets verifies."""
+        service = StripeService('sk_test', 'whsec_old, whsec_new', {})
+        payload = b'{"id": "evt_1", "type": "invoice.payment_succeeded"}'
+
+        assert service.verify_webhook(payload, self._sign(payload, 'whsec_new')) is not None
+        assert service.verify_webhook(payload, self._sign(payload, 'whsec_old')) is not None
+
+    def test_verify_webhook_reuses_keyed_hmac_across_calls(self):
+        """Test that the precomputed HMAC isn't consumed by earlier verifications."""
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        for event_id in ('evt_1', 'evt_2', 'evt_3'):
+            payload = f'{{"id": "{event_id}"}}'.encode()
+            assert service.verify_webhook(payload, self._sign(payload, 'whsec_test')).get('id') == event_id
+
+    def test_extract_customer_and_products(self):
+        """Test email and product IDs are both extracted from one event."""
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        event = {
+            'type': 'customer.subscription.updated',
+            'data': {
+                'object': {
+                    'customer_email': 'sub@example.com',
+                    'items': {'data': [{'price': {'product': 'prod_123'}}]}
+                }
+            }
+        }
+
+        assert service.extract_customer_and_products(event) == ('sub@example.com', ['prod_123'])
+
+    @patch('app.services.stripe_service._lookup_executor')
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_extract_customer_and_products_inline_for_one_fetch(self, mock_retrieve, mock_executor):
+        """Test that a single Stripe fetch runs inline instead of on the lookup pool."""
+        mock_retrieve.return_value = Mock(email='fetched@example.com')
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        event = {
+            'type': 'checkout.session.completed',
+            'data': {
+                'object': {
+                    'id': 'cs_1',
+                    'customer': 'cus_1',
+                    'line_items': {'data': [{'price': {'product': 'prod_123'}}]}
+                }
+            }
+        }
+
+        assert service.extract_customer_and_products(event) == ('fetched@example.com', ['prod_123'])
+        mock_executor.submit.assert_not_called()
+
+    @patch('app.services.stripe_service.stripe.checkout.Session.retrieve')
+    @patch('app.services.stripe_service.stripe.Customer.retrieve')
+    def test_extract_customer_and_products_pools_two_fetches(self, mock_retrieve, mock_session):
+        """Test that the customer lookup overlaps the session fetch when both are needed."""
+        from app.services import stripe_service
+
+        mock_retrieve.return_value = Mock(email='fetched@example.com')
+        mock_session.return_value = {'line_items': {'data': [{'price': {'product': 'prod_123'}}]}}
+        service = StripeService('sk_test', 'whsec_test', {})
+
+        event = {'type': 'checkout.session.completed',
+                 'data': {'object': {'id': 'cs_1', 'customer': 'cus_2'}}}
+
+        executor = stripe_service._lookup_executor
+        with patch.object(executor, 'submit', wraps=executor.submit) as mock_submit:
+            assert service.extract_customer_and_products(event) == ('fetched@example.com', ['prod_123'])
+        mock_submit.assert_called_once()
+
+    def test_extract_product_ids_reads_every_line_item(self):
+        """Test that all purchased products are returned, once each and in order."""
+        service = StripeService('sk_test', 'whsec_test', {})
+        event = {
+            'type': 'checkout.session.completed',
+            'data': {'object': {'line_items': {'data': [
+                {'price': {'product': 'prod_a'}},
+                {'price': {'product': 'prod_b'}},
+                {'price': {'product': 'prod_a'}},
+            ]}}}
+        }
+
+        assert service.extract_product_ids(event) == ['prod_a', 'prod_b']
+        assert service.extract_product_id(event) == 'prod_a'
+
 
 class TestOpenAIService:
     """Tests for OpenAIService."""
@@ -203,8 +624,66 @@ class TestOpenAIService:
         with pytest.raises(ValueError, match="OpenAI API key not configured"):
             _ = service.client
 
+    @patch('app.services.openai_service.OpenAI')
+    def test_client_is_shared_across_calls(self, mock_openai):
+        """Test that one client (and its connection pool) serves every request."""
+        service = OpenAIService(api_key='sk-test')
+        assert service.client is service.client
+        mock_openai.assert_called_once_with(
+            api_key='sk-test',
+            timeout=OpenAIService.TIMEOUT,
+            max_retries=OpenAIService.MAX_RETRIES
+        )
+
     def test_behavioral_system_prompt_exists(self):
         """Test that behavioral system prompt is defined."""
         assert OpenAIService.BEHAVIORAL_SYSTEM_PROMPT is not None
         assert len(OpenAIService.BEHAVIORAL_SYSTEM_PROMPT) > 0
         assert 'STAR' in OpenAIService.BEHAVIORAL_SYSTEM_PROMPT
+
+    def test_stream_behavioral_feedback_yields_content(self):
+        """Test that streamed chunks are reduced to their non-empty text deltas."""
+        def chunk(content):
+            return Mock(choices=[Mock(delta=Mock(content=content))])
+
+        service = OpenAIService(api_key='sk-test')
+        service._client = MagicMock()
+        service._client.chat.completions.create.return_value = iter([
+            chunk('Score'), chunk(None), Mock(choices=[]), chunk(': 8/10')
+        ])
+
+        assert list(service.stream_behavioral_feedback('q', 's')) == ['Score', ': 8/10']
+        assert service._client.chat.completions.create.call_args.kwargs['stream'] is True
+
+    def test_behavioral_requests_share_prefix_and_budget(self):
+        """Test that feedback requests lead with the fixed system prompt and tight budget."""
+        service = OpenAIService(api_key='sk-test')
+        service._client = MagicMock()
+
+        service.get_behavioral_feedback('q1', 's1')
+        service.get_behavioral_feedback('q2', 's2')
+
+        first, second = service._client.chat.completions.create.call_args_list
+        assert first.kwargs['messages'][0] == second.kwargs['messages'][0]
+        assert first.kwargs['messages'][0]['content'] is OpenAIService.BEHAVIORAL_SYSTEM_PROMPT
+        assert first.kwargs['max_tokens'] == 500
+        assert first.kwargs['temperature'] == 0.3
+
+
+class TestAssessmentService:
+    """Tests for AssessmentService."""
+
+    def test_create_app_preloads_assessments(self, monkeypatch):
+        """Test that both quizzes are parsed at startup, not on the first request."""
+        from app import create_app
+        from app.services.assessment_service import AssessmentService
+
+        AssessmentService.clear_cache()
+        monkeypatch.setenv('CLERK_PUBLISHABLE_KEY', 'pk_test_x')
+        create_app('testing')
+
+        assert AssessmentService._python_assessment
+        assert AssessmentService._java_assessment
+        with patch.object(AssessmentService, '_load_json') as mock_load:
+            assert AssessmentService.get_assessment('python') is AssessmentService._python_assessment
+            mock_load.assert_not_called()
@@ -87,6 +87,14 @@ class TestEstimateDifficultyAndTopics:
         _, _, hard_time = estimate_difficulty_and_topics("Median of Two Sorted Arrays")
         assert hard_time == 45
 
+    def test_cached_topics_not_shared_with_caller(self):
+        """Test that mutating returned topics doesn't leak into the cache."""
+        _, topics, _ = estimate_difficulty_and_topics("Two Sum")
+        topics.append('Mutated')
+
+        _, topics_again, _ = estimate_difficulty_and_topics("two sum")
+        assert 'Mutated' not in topics_again
+
 
 class TestGenerateLeetcodeUrl:
     """Tests for generate_leetcode_url function."""
@@ -129,3 +137,47 @@ class TestGenerateLeetcodeUrl:
         slug = url.replace("https://leetcode.com/problems/", "").rstrip("/")
         assert not slug.startswith("-")
         assert not slug.endswith("-")
+
+
+class TestExtractLeetcodeSlug:
+    """Tests for extract_leetcode_slug in the API routes."""
+
+    @pytest.mark.parametrize('url, slug', [
+        ('https://leetcode.com/problems/two-sum/', 'two-sum'),
+        ('https://leetcode.com/problems/two-sum/description/', 'two-sum'),
+        ('https://leetcode.com/problems/two-sum/?envType=daily-question&envId=2026-01-09', 'two-sum'),
+        ('https://leetcode.com/problems/two-sum', 'two-sum'),
+        ('https://leetcode.com/explore/', None),
+        ('https://leetcode.com/problems/two-sum#solution', 'two-sum'),
+        ('https://leetcode.com/problems/', None),
+        ('https://example.com/?next=/problems/two-sum/', None),
+        ('not a url', None),
+    ])
+    def test_extracts_slug(self, url, slug):
+        """Test slug extraction across LeetCode URL formats."""
+        from app.routes.api import extract_leetcode_slug
+        assert extract_leetcode_slug(url) == slug
+
+
+class TestTodayIso:
+    """Tests for the cached today_iso helper."""
+
+    def test_matches_today(self):
+        """Test that the cached value is today's ISO date."""
+        from datetime import date
+        from app.utils.date_utils import today_iso
+
+        assert today_iso() == date.today().isoformat()
+
+    def test_rolls_over_at_midnight(self, monkeypatch):
+        """Test that the cached string is replaced once its day has ended."""
+        from datetime import datetime
+        from app.utils import date_utils
+
+        before_midnight = datetime(2026, 1, 1, 23, 59, 59).timestamp()
+        monkeypatch.setattr(date_utils, '_today', ('', 0.0))
+        monkeypatch.setattr(date_utils.time, 'time', lambda: before_midnight)
+        assert date_utils.today_iso() == '2026-01-01'
+
+        monkeypatch.setattr(date_utils.time, 'time', lambda: before_midnight + 1)
+        assert date_utils.today_iso() == '2026-01-02'